@@ -0,0 +1,88 @@
+# backfill_next_due.py
+"""
+One-shot backfill of recurring_payments.next_due_date.
+
+next_due_date is the date a recurring row next falls due under the
+FREQUENCY_DAYS rules (reminder_core.stored_next_due), so "what is due" becomes
+one indexed range scan, next_due_date <= today, like one_time_reminders'
+reminder_date. Run the migration first (--sql prints it, together with the
+updated_at trigger the mirror's delta sync needs), then this tool,
+then set REMINDER_NEXT_DUE=1 so writes keep the column current and due checks
+use it.
+
+Pages through the table in id order and only updates rows whose stored value
+differs, grouped into one in_() update per value. Re-running is safe: an
+interrupted run just continues with whatever is still out of date.
+
+    python backfill_next_due.py [--batch 500] [--dry-run]
+    python backfill_next_due.py --sql
+"""
+import argparse
+from datetime import date
+from reminder_core import init_supabase, iter_table_pages, stored_next_due, update_reminders, PAGE_SIZE
+from local_store import RECURRING_TABLE, UPDATED_AT_SQL
+from config import setup_logging
+
+logger = setup_logging("backfill_next_due")
+
+BATCH_SIZE = 500
+COLUMNS = "id,frequency,last_recorded_date,is_active,next_due_date"
+
+MIGRATION_SQL = """\
+alter table recurring_payments add column if not exists next_due_date date;
+create index if not exists recurring_payments_next_due
+    on recurring_payments (next_due_date) where is_active is not false;
+create index if not exists one_time_reminders_due
+    on one_time_reminders (reminder_date) where is_completed is not true;
+"""
+
+
+def stale_rows(rows, today):
+    """{next_due_date value: [ids]} for rows whose stored value is out of date."""
+    groups = {}
+    for row in rows:
+        value = stored_next_due(row, today)
+        if value != row.get("next_due_date"):
+            groups.setdefault(value, []).append(str(row["id"]))
+    return groups
+
+
+def backfill(supabase, batch_size=BATCH_SIZE, dry_run=False, today=None):
+    """Bring next_due_date up to date. Returns {"scanned", "updated", "failed"} counts."""
+    if today is None:
+        today = date.today()
+    stats = {"scanned": 0, "updated": 0, "failed": 0}
+    for page in iter_table_pages(supabase, RECURRING_TABLE, COLUMNS, PAGE_SIZE):
+        stats["scanned"] += len(page)
+        for value, ids in stale_rows(page, today).items():
+            for start in range(0, len(ids), batch_size):
+                chunk = ids[start:start + batch_size]
+                if dry_run:
+                    stats["updated"] += len(chunk)
+                    continue
+                results = update_reminders(supabase, RECURRING_TABLE, chunk, {"next_due_date": value})
+                ok = sum(results.values())
+                stats["updated"] += ok
+                stats["failed"] += len(chunk) - ok
+        logger.info("Backfill: %d scanned, %d updated, %d failed", stats["scanned"], stats["updated"], stats["failed"])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill recurring_payments.next_due_date.")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="ids per update request")
+    parser.add_argument("--dry-run", action="store_true", help="count stale rows without writing")
+    parser.add_argument("--sql", action="store_true", help="print the migration SQL and exit")
+    args = parser.parse_args(argv)
+
+    if args.sql:
+        print(UPDATED_AT_SQL + MIGRATION_SQL, end="")
+        return
+    supabase = init_supabase(probe=False, rest_only=True)
+    stats = backfill(supabase, args.batch, args.dry_run)
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"Scanned {stats['scanned']}. {verb} {stats['updated']}, failed {stats['failed']}.")
+
+
+if __name__ == "__main__":
+    main()
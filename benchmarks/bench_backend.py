@@ -0,0 +1,194 @@
+# benchmarks/bench_backend.py
+"""
+Hot-path benchmarks against the in-process fake Supabase backend.
+
+Times get_due_reminders (server-filtered and full scan), the show_due_popups data
+prep (DueSnapshot.fetch), ReminderApp.refresh_active's sync + render path and
+delete_selected's queued delete + flush, at 100 / 10k / 100k rows. Reports wall
+time, round trips and rows/bytes returned, so regressions show up without a network.
+Before timing, the server-filtered due query is checked against the full scan and
+the is_recurring_due predicate on 2000 generated rows plus awkward ones
+(tricky_rows), on several dates (month ends, a leap day).
+
+Run from the repo root:
+    python benchmarks/bench_backend.py [--sizes 100 10000] [--latency 0.02] [--json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_supabase import FakeSupabase
+from reminder_core import get_due_reminders, get_due_recurring_reminders, is_recurring_due
+from notifier import DueSnapshot
+from local_store import LocalMirror, RECURRING_TABLE, ONE_TIME_TABLE
+from write_queue import WriteQueue
+
+DEFAULT_SIZES = [100, 10_000, 100_000]
+FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "yearly", "14"]
+GROUPS = ["СОЛУНСКА", "БАНКЯ", "ДОМАКИНСТВО", "АВТОМОБИЛ", "КОТКИ"]
+TODAY = date(2025, 10, 20)
+CHECK_DATES = [TODAY, date(2024, 2, 29), date(2024, 3, 1), date(2025, 1, 31), date(2025, 2, 28),
+               date(2025, 3, 31), date(2025, 12, 31), date(2026, 1, 1)]
+
+
+def make_tables(n, seed=1):
+    """n recurring rows and n // 10 one-time rows with a realistic share of due items."""
+    rng = random.Random(seed)
+    stamp = "2025-10-01T00:00:00+00:00"
+    recurring = []
+    for i in range(n):
+        last = TODAY - timedelta(days=rng.randint(0, 400))
+        recurring.append({
+            "id": f"r{i}",
+            "name": f"Payment {i}",
+            "amount": rng.randint(5, 500),
+            "frequency": rng.choice(FREQUENCIES),
+            "day_of_month": rng.randint(1, 28),
+            "group_name": rng.choice(GROUPS),
+            "last_recorded_date": last.isoformat(),
+            "is_active": rng.random() > 0.1,
+            "updated_at": stamp,
+        })
+    one_time = []
+    for i in range(max(1, n // 10)):
+        one_time.append({
+            "id": f"o{i}",
+            "name": f"One-off {i}",
+            "amount": rng.randint(5, 500),
+            "reminder_date": (TODAY + timedelta(days=rng.randint(-30, 60))).isoformat(),
+            "group_name": rng.choice(GROUPS),
+            "is_completed": rng.random() < 0.3,
+            "updated_at": stamp,
+        })
+    return {RECURRING_TABLE: recurring, ONE_TIME_TABLE: one_time}
+
+
+def tricky_rows():
+    """Recurring rows that stress the server filter: case and padding, nulls, month ends, leap days."""
+    frequencies = ["Monthly", " WEEKLY ", "Yearly", "daily", "QUARTERLY", "14", " 30 ", "fortnightly", "", None]
+    last_dates = [None, "2024-02-29", "2024-02-28", "2024-03-01", "2024-12-31", "2025-01-01", "2025-01-31",
+                  "2025-02-28", "2025-03-01", "2025-03-31", "2025-09-30", "2025-10-01", "2025-10-20",
+                  "2025-10-31", "2025-12-31", "2026-01-01"]
+    rows = []
+    for i, (freq, last) in enumerate((f, d) for f in frequencies for d in last_dates):
+        rows.append({
+            "id": f"t{i}",
+            "name": f"Tricky {i}",
+            "amount": 1,
+            "frequency": freq,
+            "group_name": GROUPS[i % len(GROUPS)],
+            "last_recorded_date": last,
+            "is_active": (True, None, False)[i % 3] if i % 7 == 0 else True,
+            "updated_at": "2025-10-01T00:00:00+00:00",
+        })
+    return rows
+
+
+def check_due_filter(client):
+    """Server-filtered due rows must equal the full scan and is_recurring_due, on every CHECK_DATES day."""
+    rows = client.tables[RECURRING_TABLE]
+    for day in CHECK_DATES:
+        filtered = sorted(r["id"] for r in get_due_recurring_reminders(client, day))
+        scanned = sorted(r["id"] for r in get_due_recurring_reminders(client, day, server_filter=False))
+        expected = sorted(r["id"] for r in rows if is_recurring_due(r, day))
+        assert filtered == scanned == expected, (day, set(filtered) ^ set(expected), set(scanned) ^ set(expected))
+
+
+def headless_app(client, mirror, writes):
+    """ReminderApp with its data attributes wired but no Tk widgets, for machines without a display."""
+    from main import ReminderApp
+    app = ReminderApp.__new__(ReminderApp)
+    app.supabase = client
+    app.online = True
+    app.mirror = mirror
+    app.writes = writes
+    app._dataset = []
+    app._dataset_loaded = False
+    return app
+
+
+def measure(client, label, fn, results, size):
+    client.reset_counters()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    results.append({
+        "case": label,
+        "rows": size,
+        "seconds": round(elapsed, 4),
+        "round_trips": client.round_trips,
+        "rows_returned": client.rows_sent,
+        "bytes_returned": client.bytes_sent,
+    })
+
+
+def run_size(size, latency, results):
+    client = FakeSupabase(make_tables(size), latency=latency)
+
+    measure(client, "get_due_reminders (server filter)",
+            lambda: get_due_reminders(client, TODAY), results, size)
+    measure(client, "get_due_reminders (full scan)",
+            lambda: get_due_reminders(client, TODAY, server_filter=False), results, size)
+    measure(client, "show_due_popups data prep",
+            lambda: DueSnapshot.fetch(client, TODAY), results, size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = LocalMirror(os.path.join(tmp, "bench.db"))
+        writes = WriteQueue(mirror, client)
+        app = headless_app(client, mirror, writes)
+
+        def refresh():
+            app._sync_mirror()
+            app.reload_dataset()
+
+        measure(client, "refresh_active (cold mirror)", refresh, results, size)
+        measure(client, "refresh_active (warm mirror)", refresh, results, size)
+
+        victims = [r["id"] for r in client.tables[RECURRING_TABLE][: max(1, size // 100)]]
+
+        def delete():
+            writes.delete_reminders(victims)
+            writes.flush()
+            app.reload_dataset()
+
+        measure(client, f"delete_selected ({len(victims)} rows)", delete, results, size)
+        mirror.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every round trip")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    tables = make_tables(2000)
+    tables[RECURRING_TABLE].extend(tricky_rows())
+    check_due_filter(FakeSupabase(tables))
+
+    results = []
+    for size in args.sizes:
+        run_size(size, args.latency, results)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'case':<36} {'rows':>7} {'seconds':>9} {'trips':>6} {'rows out':>9} {'KB out':>9}")
+    for r in results:
+        print(f"{r['case']:<36} {r['rows']:>7} {r['seconds']:>9.4f} {r['round_trips']:>6} "
+              f"{r['rows_returned']:>9} {r['bytes_returned'] / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
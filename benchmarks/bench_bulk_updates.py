@@ -0,0 +1,73 @@
+# benchmarks/bench_bulk_updates.py
+"""
+Single-id record_payment / mark_one_time_completed vs. the bulk record_payments /
+mark_one_time_reminders_completed, against the fake backend with per-request latency.
+
+Run from the repo root:
+    python benchmarks/bench_bulk_updates.py [--counts 10 100 1000] [--latency 0.02]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_supabase import FakeSupabase
+from reminder_core import (
+    record_payment,
+    mark_one_time_completed,
+    record_payments,
+    mark_one_time_reminders_completed
+)
+
+DEFAULT_COUNTS = [10, 100, 1000]
+
+
+def make_client(n, latency):
+    return FakeSupabase({
+        "recurring_payments": [{"id": f"r{i}", "frequency": "monthly"} for i in range(n)],
+        "one_time_reminders": [{"id": f"o{i}", "is_completed": False} for i in range(n)],
+    }, latency=latency)
+
+
+def run(n, latency):
+    ids = [f"r{i}" for i in range(n)]
+    one_time_ids = [f"o{i}" for i in range(n)]
+
+    client = make_client(n, latency)
+    t0 = time.perf_counter()
+    for reminder_id in ids:
+        record_payment(client, reminder_id)
+    for reminder_id in one_time_ids:
+        mark_one_time_completed(client, reminder_id)
+    single = time.perf_counter() - t0, client.round_trips
+
+    client = make_client(n, latency)
+    t0 = time.perf_counter()
+    results = record_payments(client, ids)
+    results.update(mark_one_time_reminders_completed(client, one_time_ids))
+    bulk = time.perf_counter() - t0, client.round_trips
+    assert all(results.values())
+    return single, bulk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every round trip")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    print(f"{'ids/table':>10} {'single s':>10} {'trips':>6} {'bulk s':>10} {'trips':>6} {'ids/s single':>13} {'ids/s bulk':>11}")
+    for n in args.counts:
+        (t_single, trips_single), (t_bulk, trips_bulk) = run(n, args.latency)
+        print(f"{n:>10} {t_single:>10.3f} {trips_single:>6} {t_bulk:>10.3f} {trips_bulk:>6} "
+              f"{2 * n / t_single:>13.0f} {2 * n / t_bulk:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_due_mask.py
+"""
+Scalar is_recurring_due vs. batch recurring_due_mask at 10k / 100k / 1M rows.
+
+Run from the repo root:  python benchmarks/bench_due_mask.py [sizes...]
+"""
+import os
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_core import is_recurring_due, recurring_due_mask, recurring_due_mask_columns
+
+FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "yearly", "Monthly", "14", "30"]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def make_rows(n, seed=42):
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    rows = []
+    for i in range(n):
+        last = start + timedelta(days=rng.randint(0, 1000))
+        rows.append({
+            "id": i,
+            "frequency": rng.choice(FREQUENCIES),
+            "last_recorded_date": None if rng.random() < 0.05 else last.isoformat(),
+            "is_active": rng.random() > 0.1,
+        })
+    return rows
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None):
+    sizes = [int(a) for a in (argv or sys.argv[1:])] or DEFAULT_SIZES
+    today = date(2025, 10, 20)
+    print(f"{'rows':>10} {'scalar s':>10} {'batch s':>10} {'columnar s':>11} {'speedup':>8}")
+    for n in sizes:
+        rows = make_rows(n)
+        scalar, t_scalar = timed(lambda: [is_recurring_due(r, today) for r in rows])
+        batch, t_batch = timed(lambda: recurring_due_mask(rows, today))
+
+        # Columnar input with dates already as ordinals, as a bulk loader would hold them
+        freqs = [r["frequency"] for r in rows]
+        ords = [date.fromisoformat(r["last_recorded_date"]).toordinal() if r["last_recorded_date"] else None
+                for r in rows]
+        active = [r["is_active"] for r in rows]
+        columnar, t_col = timed(lambda: recurring_due_mask_columns(freqs, ords, today, active))
+
+        assert scalar == batch == columnar, "batch result differs from is_recurring_due"
+        print(f"{n:>10} {t_scalar:>10.3f} {t_batch:>10.3f} {t_col:>11.3f} {t_scalar / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
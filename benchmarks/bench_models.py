@@ -0,0 +1,107 @@
+# benchmarks/bench_models.py
+"""
+Memory and throughput of reminder rows as dicts, Reminder objects and ReminderColumns.
+
+Rows start as PostgREST would deliver them (parsed JSON). For each
+representation it measures retained memory (tracemalloc), build time, and
+two passes the app repeats: the due check and a due-amount total per group.
+The due answers are checked to be identical across representations.
+
+Run from the repo root:
+    python benchmarks/bench_models.py [--rows 100000] [--repeat 3]
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bench_backend import make_tables, TODAY
+from local_store import RECURRING_TABLE
+from reminder_core import recurring_due_mask
+from models import Reminder, ReminderColumns, Kind, reminders_due_mask
+
+
+def retained(build):
+    """(result, bytes still allocated once build() returns)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def dict_totals(rows):
+    totals = {}
+    for row, due in zip(rows, recurring_due_mask(rows, TODAY)):
+        if due:
+            group = row.get("group_name") or ""
+            totals[group] = totals.get(group, 0) + float(row.get("amount") or 0)
+    return totals
+
+
+def model_totals(items):
+    totals = {}
+    for item, due in zip(items, reminders_due_mask(items, TODAY)):
+        if due:
+            totals[item.group_name] = totals.get(item.group_name, 0) + item.amount
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    payload = json.dumps(make_tables(args.rows)[RECURRING_TABLE])
+
+    # Memory under tracemalloc, timings without it (tracing slows allocation several-fold)
+    rows, dict_bytes = retained(lambda: json.loads(payload))
+    items, model_bytes = retained(lambda: Reminder.from_rows(rows, Kind.RECURRING))
+    cols, col_bytes = retained(lambda: ReminderColumns.from_rows(items, Kind.RECURRING))
+    _, dict_build = best_of(args.repeat, lambda: json.loads(payload))
+    _, model_build = best_of(args.repeat, lambda: Reminder.from_rows(rows, Kind.RECURRING))
+    _, col_build = best_of(args.repeat, lambda: ReminderColumns.from_rows(items, Kind.RECURRING))
+
+    dict_mask, dict_due = best_of(args.repeat, lambda: recurring_due_mask(rows, TODAY))
+    model_mask, model_due = best_of(args.repeat, lambda: reminders_due_mask(items, TODAY))
+    assert model_mask == [item.is_due(TODAY) for item in items]
+    col_mask, col_due = best_of(args.repeat, lambda: cols.due_mask(TODAY))
+    assert dict_mask == model_mask == col_mask
+
+    dict_sum, dict_total = best_of(args.repeat, lambda: dict_totals(rows))
+    model_sum, model_total = best_of(args.repeat, lambda: model_totals(items))
+    col_sum, col_total = best_of(args.repeat, lambda: cols.totals_by_group(cols.due_mask(TODAY)))
+    assert {g: round(v, 2) for g, v in dict_sum.items()} == {g: round(v, 2) for g, v in model_sum.items()} \
+        == {g: round(v, 2) for g, v in col_sum.items()}
+
+    print(f"{args.rows} recurring rows, {sum(dict_mask)} due; build = parse JSON / from dicts / from Reminders")
+    print(f"{'representation':<16} {'MiB':>8} {'B/row':>7} {'build s':>8} {'due s':>7} {'totals s':>9}")
+    for label, size, build, due, total in (
+        ("dict (parsed)", dict_bytes, dict_build, dict_due, dict_total),
+        ("Reminder", model_bytes, model_build, model_due, model_total),
+        ("ReminderColumns", col_bytes, col_build, col_due, col_total),
+    ):
+        print(f"{label:<16} {size / 2**20:>8.1f} {size / args.rows:>7.0f} {build:>8.3f} {due:>7.3f} {total:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
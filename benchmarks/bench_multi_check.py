@@ -0,0 +1,70 @@
+# benchmarks/bench_multi_check.py
+"""
+Multi-profile due checks on one event loop against fake async backends.
+
+Compares concurrency=1 (one query at a time, like back-to-back cron jobs) with
+the concurrent default. Checks the results match the sync get_due_reminders for
+every profile, and that requests in flight across all backends together reach
+but never exceed the concurrency limit (so --profiles must exceed --concurrency).
+
+Run from the repo root:
+    python benchmarks/bench_multi_check.py [--profiles 10] [--rows 2000] [--latency 0.05]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_supabase import FakeAsyncSupabase, InFlight
+from bench_backend import make_tables, TODAY
+from reminder_core import get_due_reminders
+from multi_check import Profile, check_profiles, exit_code, DEFAULT_CONCURRENCY
+
+
+def run(n_profiles, rows, latency, concurrency):
+    profiles = [Profile(f"p{i}", f"https://p{i}.example", "key") for i in range(n_profiles)]
+    # One counter across every backend: the semaphore limits requests process-wide, not per profile
+    in_flight = InFlight()
+    backends = {p.name: FakeAsyncSupabase(make_tables(rows, seed=i), latency=latency, counter=in_flight)
+                for i, p in enumerate(profiles)}
+    t0 = time.perf_counter()
+    results = check_profiles(profiles, TODAY, concurrency, client_factory=lambda p: backends[p.name])
+    elapsed = time.perf_counter() - t0
+    # Before the checks below, which query the same backends
+    trips = sum(b.round_trips for b in backends.values())
+
+    for r in results:
+        expected = get_due_reminders(backends[r.profile.name].backend, TODAY)
+        assert sorted(x["id"] for x in r.recurring + r.one_time) == sorted(x["id"] for x in expected), r.profile.name
+    peak = in_flight.peak
+    assert peak <= concurrency, (peak, concurrency)
+    if latency > 0:
+        # Every profile starts at once, so with more requests than slots the limit is reached
+        assert peak == concurrency, (peak, concurrency)
+    return elapsed, results, peak, trips
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--profiles", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args(argv)
+    if args.profiles <= args.concurrency:
+        parser.error("--profiles must exceed --concurrency for the limit to be exercised")
+
+    logging.disable(logging.WARNING)
+    print(f"{'concurrency':>11} {'seconds':>9} {'trips':>6} {'peak':>5} {'due':>7} {'exit':>5}")
+    for concurrency in (1, args.concurrency):
+        elapsed, results, peak, trips = run(args.profiles, args.rows, args.latency, concurrency)
+        print(f"{concurrency:>11} {elapsed:>9.3f} {trips:>6} {peak:>5} {sum(len(r) for r in results):>7} {exit_code(results):>5}")
+
+
+if __name__ == "__main__":
+    main()
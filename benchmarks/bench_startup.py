@@ -0,0 +1,68 @@
+# benchmarks/bench_startup.py
+"""
+Import-time and cold-start budget for the entry points.
+
+Each step runs in a fresh interpreter so nothing is cached between measurements.
+Building clients needs no network (probe=False); dummy credentials are used when
+SUPABASE_URL/SUPABASE_KEY are unset. Exits 1 if any step is over budget.
+
+Run from the repo root:  python benchmarks/bench_startup.py
+"""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, setup code, measured code, budget in ms)
+STEPS = [
+    ("import reminder_core", "", "import reminder_core", 150),
+    ("import reminder_script (cron entry)", "", "import reminder_script", 300),
+    ("init_supabase(rest_only, no probe)", "import reminder_core",
+     "reminder_core.init_supabase(probe=False, rest_only=True)", 600),
+    ("init_supabase(full, no probe)", "import reminder_core",
+     "reminder_core.init_supabase(probe=False)", 1200),
+    ("cold --check path before first query", "",
+     "import reminder_script, reminder_core; reminder_core.init_supabase(probe=False, rest_only=True)", 900),
+]
+
+RUNNER = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+{setup}
+t0 = time.perf_counter()
+{code}
+print(json.dumps(time.perf_counter() - t0))
+"""
+
+
+def measure(setup, code, repeat=3):
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+    env.setdefault("SUPABASE_KEY", "benchmark-key")
+    env["REMINDER_MIRROR_DB"] = ":memory:"
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", RUNNER.format(root=ROOT, setup=setup, code=code)],
+            capture_output=True, text=True, env=env, cwd=ROOT, check=True
+        )
+        elapsed = json.loads(out.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    over = False
+    print(f"{'step':<42} {'ms':>8} {'budget':>8}")
+    for label, setup, code, budget in STEPS:
+        ms = measure(setup, code)
+        flag = "" if ms <= budget else "  OVER"
+        over = over or bool(flag)
+        print(f"{label:<42} {ms:>8.1f} {budget:>8}{flag}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/check_change_feed.py
+"""
+ChangeFeed against a LocalEventSource and an in-memory "server" snapshot.
+
+Pushes insert/update/delete events (some before start, some after) and a
+RESYNC after the server changed behind the feed's back. Checks drain_changes(),
+the ReminderIndex contents and reads, and the write-through to a LocalMirror.
+
+Run from the repo root:  python benchmarks/check_change_feed.py
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from change_feed import ChangeFeed, ReminderIndex, LocalEventSource, INSERT, UPDATE, DELETE
+from local_store import LocalMirror, RECURRING_TABLE, ONE_TIME_TABLE
+
+SERVER = {
+    RECURRING_TABLE: [
+        {"id": "r1", "name": "Rent", "amount": 500, "frequency": "monthly", "group_name": "БАНКЯ", "is_active": True},
+        {"id": "r2", "name": "Gym", "amount": 30, "frequency": "monthly", "group_name": "БАНКЯ", "is_active": True},
+    ],
+    ONE_TIME_TABLE: [
+        {"id": "o1", "name": "Fee", "amount": 10, "reminder_date": "2025-10-10", "group_name": "КОТКИ",
+         "is_completed": False},
+    ],
+}
+
+
+def settle(feed, expect, done=None, timeout=5):
+    """Merge drain_changes() until every (table, kind, id) in `expect` has been seen and done(seen) holds."""
+    seen = {}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        feed.wait(0.05)
+        for table, (changed, deleted) in feed.drain_changes().items():
+            rows, gone = seen.setdefault(table, ({}, set()))
+            for row in changed:
+                rows[str(row["id"])] = row
+                gone.discard(str(row["id"]))
+            for reminder_id in deleted:
+                rows.pop(reminder_id, None)
+                gone.add(reminder_id)
+        if all(rid in seen.get(t, ({}, set()))[0 if kind == "changed" else 1] for t, kind, rid in expect) \
+                and (done is None or done(seen)):
+            return seen
+    raise AssertionError(f"changes never arrived: {expect}, got {seen}")
+
+
+def main():
+    server = {table: [dict(r) for r in rows] for table, rows in SERVER.items()}
+    mirror = LocalMirror(":memory:")
+    for table, rows in server.items():
+        mirror.upsert_rows(table, rows)
+    source = LocalEventSource()
+    feed = ChangeFeed(ReminderIndex(), source, loader=lambda: server, mirror=mirror)
+
+    # Pushed before start: held back, then delivered in order after the initial load
+    source.push(RECURRING_TABLE, UPDATE, {"id": "r1", "amount": 550})
+    feed.start()
+    seen = settle(feed, [(RECURRING_TABLE, "changed", "r1"), (ONE_TIME_TABLE, "changed", "o1")],
+                  done=lambda seen: seen[RECURRING_TABLE][0]["r1"].get("amount") == 550)
+    assert feed.index.get_row(RECURRING_TABLE, "r1")["name"] == "Rent", "partial update dropped columns"
+
+    source.push(RECURRING_TABLE, INSERT, {"id": "r3", "name": "Water", "amount": 20, "frequency": "monthly",
+                                          "group_name": "КОТКИ", "is_active": True})
+    source.push(RECURRING_TABLE, DELETE, None, {"id": "r2"})
+    source.push(ONE_TIME_TABLE, UPDATE, {"id": "o1", "is_completed": True})
+    source.push(RECURRING_TABLE, UPDATE, {"id": "r3", "amount": 25})
+    source.push(ONE_TIME_TABLE, INSERT, {"id": "o2", "name": "Vet", "amount": 60, "reminder_date": "2025-10-01",
+                                         "group_name": "КОТКИ", "is_completed": False})
+    source.push(ONE_TIME_TABLE, DELETE, None, {"id": "o2"})
+    source.push("profiles", INSERT, {"id": "x"})  # not a reminder table: ignored
+    seen = settle(feed, [(RECURRING_TABLE, "changed", "r3"), (RECURRING_TABLE, "deleted", "r2"),
+                         (ONE_TIME_TABLE, "changed", "o1"), (ONE_TIME_TABLE, "deleted", "o2")],
+                  done=lambda seen: seen[RECURRING_TABLE][0]["r3"].get("amount") == 25)
+    assert set(seen) == {RECURRING_TABLE, ONE_TIME_TABLE}, seen
+    assert seen[RECURRING_TABLE][0]["r3"]["amount"] == 25, "later update lost"
+    assert "o2" not in seen[ONE_TIME_TABLE][0], "inserted-then-deleted row reported as changed"
+
+    index = feed.index
+    assert index.ids(RECURRING_TABLE) == {"r1", "r3"} and index.ids(ONE_TIME_TABLE) == {"o1"}
+    assert [r["id"] for r in index.get_active_reminders("КОТКИ")] == ["r3"]
+    assert index.get_active_one_time() == [], "completed reminder still listed as active"
+    assert sorted(r["id"] for r in mirror.get_active_reminders()) == ["r1", "r3"]
+    assert mirror.get_row(RECURRING_TABLE, "r2") is None and mirror.get_row(ONE_TIME_TABLE, "o2") is None
+
+    # Events missed while disconnected: the server moved on, RESYNC reloads the snapshot
+    server[RECURRING_TABLE] = [r for r in server[RECURRING_TABLE] if r["id"] == "r1"] + [
+        {"id": "r4", "name": "Power", "amount": 80, "frequency": "monthly", "group_name": "БАНКЯ", "is_active": True}]
+    server[ONE_TIME_TABLE] = []
+    source.resync()
+    seen = settle(feed, [(RECURRING_TABLE, "changed", "r4"), (RECURRING_TABLE, "deleted", "r3"),
+                         (ONE_TIME_TABLE, "deleted", "o1")])
+    assert set(seen[RECURRING_TABLE][0]) == {"r1", "r4"}, "RESYNC must hand over the full snapshot"
+    assert index.ids(RECURRING_TABLE) == {"r1", "r4"} and index.ids(ONE_TIME_TABLE) == set()
+
+    feed.stop()
+    assert not feed._thread.is_alive(), "consumer thread still running after stop()"
+    print(f"change feed: {len(index)} rows indexed after inserts, updates, deletes and a RESYNC")
+
+
+if __name__ == "__main__":
+    main()
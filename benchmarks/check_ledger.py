@@ -0,0 +1,74 @@
+# benchmarks/check_ledger.py
+"""
+Day-to-day behaviour of NotificationLedger under a fake clock.
+
+Announces and acknowledges a never-paid recurring reminder, a paid one and a
+one-time reminder on day N, then checks that pending() returns nothing on day
+N+1, and that recording a payment makes a new occurrence that is announced
+again.
+
+Run from the repo root:  python benchmarks/check_ledger.py
+"""
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from ledger import NotificationLedger
+from models import Reminder, Kind
+
+DAY_N = date(2025, 10, 15)
+
+
+class FakeClock:
+    def __init__(self, day):
+        self.now = datetime(day.year, day.month, day.day, 9, 0)
+
+    def __call__(self):
+        return self.now
+
+    def next_day(self):
+        self.now += timedelta(days=1)
+        return self.now.date()
+
+
+def ids(items):
+    return sorted(item.id for item in items)
+
+
+def main():
+    clock = FakeClock(DAY_N)
+    ledger = NotificationLedger(":memory:", clock=clock)
+    never_paid = Reminder.from_row({"id": "new", "name": "Gym", "frequency": "monthly"}, Kind.RECURRING)
+    paid = Reminder.from_row({"id": "rent", "name": "Rent", "frequency": "monthly",
+                              "last_recorded_date": "2025-09-01"}, Kind.RECURRING)
+    one_time = Reminder.from_row({"id": "fee", "name": "Fee", "reminder_date": "2025-10-10"}, Kind.ONE_TIME)
+    items = [never_paid, paid, one_time]
+
+    assert ids(ledger.pending(items)) == ["fee", "new", "rent"]
+    ledger.record(items)
+    assert ledger.pending(items) == [], "announced items came back the same day"
+
+    # Not acknowledged: announced again the next day
+    day = clock.next_day()
+    assert ids(ledger.pending(items)) == ["fee", "new", "rent"], "unacknowledged items were not repeated"
+    ledger.record(items)
+    ledger.acknowledge(items)
+
+    # Acknowledged: quiet on the following days, including the never-paid reminder
+    for _ in range(3):
+        day = clock.next_day()
+        assert ledger.pending(items) == [], f"acknowledged items announced again on {day}"
+
+    # Recording a payment moves the due date: a new occurrence, announced once it falls due
+    paid_now = Reminder.from_row({"id": "new", "name": "Gym", "frequency": "monthly",
+                                  "last_recorded_date": day.isoformat()}, Kind.RECURRING)
+    month_later = paid_now.next_due(day)
+    assert ledger.pending([paid_now], month_later) == [paid_now], "a paid reminder's next occurrence was suppressed"
+    print(f"ledger: acknowledged on {DAY_N}, quiet through {day}; next occurrence {month_later} announced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/check_realtime_feed.py
+"""
+End-to-end check of SupabaseRealtimeSource against a local Phoenix-style websocket server.
+
+The server acknowledges the channel join with postgres_changes binding ids,
+then pushes one UPDATE. The check passes when that change comes out of
+ChangeFeed.drain_changes() after the subscribe, and stop() ends the listener
+thread.
+
+Run from the repo root:  python benchmarks/check_realtime_feed.py
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from websockets.asyncio.server import serve
+from change_feed import ChangeFeed, ReminderIndex, SupabaseRealtimeSource, TABLES
+from local_store import RECURRING_TABLE
+
+ROW = {"id": "r1", "name": "Rent", "amount": 500, "frequency": "monthly", "is_active": True}
+
+
+async def handler(ws):
+    async for raw in ws:
+        msg = json.loads(raw)
+        if msg["event"] == "phx_join":
+            bindings = msg["payload"]["config"]["postgres_changes"]
+            changes = [dict(b, id=i + 1) for i, b in enumerate(bindings)]
+            await ws.send(json.dumps({"event": "phx_reply", "topic": msg["topic"], "ref": msg["ref"],
+                                      "payload": {"status": "ok", "response": {"postgres_changes": changes}}}))
+            # Give the client time to process the join before the change arrives
+            await asyncio.sleep(0.2)
+            await ws.send(json.dumps({"event": "postgres_changes", "topic": msg["topic"], "ref": None, "payload": {
+                "ids": [c["id"] for c in changes],
+                "data": {"schema": "public", "table": RECURRING_TABLE, "commit_timestamp": "2025-10-15T09:00:00Z",
+                         "type": "UPDATE", "errors": None, "columns": [], "record": ROW, "old_record": {"id": "r1"}},
+            }}))
+        elif msg["event"] == "heartbeat":
+            await ws.send(json.dumps({"event": "phx_reply", "topic": "phoenix", "ref": msg["ref"],
+                                      "payload": {"status": "ok", "response": {}}}))
+
+
+def run_server(ready, stop, port_box):
+    async def main():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port_box.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            while not stop.is_set():
+                await asyncio.sleep(0.05)
+    asyncio.run(main())
+
+
+def main():
+    ready, stop, port_box = threading.Event(), threading.Event(), []
+    server = threading.Thread(target=run_server, args=(ready, stop, port_box), daemon=True)
+    server.start()
+    ready.wait(5)
+
+    source = SupabaseRealtimeSource(url=f"http://127.0.0.1:{port_box[0]}", key="test-key", tables=TABLES)
+    feed = ChangeFeed(ReminderIndex(), source).start()
+    deadline = time.monotonic() + 10
+    changed = []
+    while time.monotonic() < deadline and not changed:
+        feed.wait(0.5)
+        changed = feed.drain_changes().get(RECURRING_TABLE, ([], []))[0]
+    feed.stop()
+    stop.set()
+
+    assert changed and changed[0]["id"] == "r1", "no change event reached drain_changes()"
+    assert feed.index.get_row(RECURRING_TABLE, "r1")["name"] == "Rent"
+    assert not source._thread.is_alive(), "listener thread still running after stop()"
+    print("realtime change delivered:", changed[0])
+
+
+if __name__ == "__main__":
+    main()
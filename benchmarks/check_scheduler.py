@@ -0,0 +1,99 @@
+# benchmarks/check_scheduler.py
+"""
+DueScheduler driven by a fake clock and sleep.
+
+Loads a handful of reminders and runs the daemon loop over three days. Fake
+syncs record a payment, delete a reminder and re-send one that was already
+announced. Checks that every reminder fires at its due instant, that ties fire
+in heap order, that announced items come back the next day until recorded, and
+that no sleep exceeds RESYNC_SECONDS.
+
+Run from the repo root:  python benchmarks/check_scheduler.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scheduler import DueScheduler
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+
+START = datetime(2025, 10, 15, 8, 0)
+STOP = datetime(2025, 10, 17, 10, 0)
+
+RECURRING = [
+    {"id": "a", "name": "Rent", "frequency": "monthly", "last_recorded_date": "2025-09-10"},  # overdue
+    {"id": "b", "name": "Gym", "frequency": "weekly", "last_recorded_date": "2025-10-12"},  # 10-19
+    {"id": "d", "name": "Plants", "frequency": "3", "last_recorded_date": "2025-10-14"},  # 10-17, deleted first
+    {"id": "e", "name": "Phone", "frequency": "monthly"},  # never paid: today
+    {"id": "f", "name": "Old", "frequency": "monthly", "is_active": False},  # never
+]
+ONE_TIME = [{"id": "c", "name": "Fee", "reminder_date": "2025-10-16", "is_completed": False}]
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += timedelta(seconds=seconds)
+
+
+def at(day, hour):
+    return datetime(2025, 10, day, hour, 0)
+
+
+def main():
+    clock = FakeClock(START)
+    scheduler = DueScheduler(clock=clock, sleep=clock.sleep)
+    scheduler.load(RECURRING, ONE_TIME)
+    assert len(scheduler) == 5, "inactive reminder was scheduled"
+    assert scheduler.next_wakeup() == at(1, 9), scheduler.next_wakeup()
+
+    fired = []
+    pending_syncs = [
+        # e paid after it fired: its next occurrence (11-01) replaces tomorrow's snooze; d deleted
+        (at(15, 12), {RECURRING_TABLE: ([dict(RECURRING[3], last_recorded_date="2025-10-15")], ["d"]),
+                      ONE_TIME_TABLE: ([], [])}),
+        # a re-sent unchanged after firing: stays snoozed until tomorrow
+        (at(16, 10), {RECURRING_TABLE: ([RECURRING[0]], []), ONE_TIME_TABLE: ([], [])}),
+    ]
+
+    def sync():
+        if pending_syncs and clock() >= pending_syncs[0][0]:
+            return pending_syncs.pop(0)[1]
+        return {}
+
+    def on_due(items):
+        fired.append((clock(), [item.id for _table, item in items]))
+
+    scheduler.run(on_due, sync=sync, should_stop=lambda: clock() >= STOP)
+
+    expected = [
+        (START, ["a"]),  # overdue at load
+        (at(15, 9), ["e"]),  # never paid: due today at NOTIFY_AT
+        (at(16, 9), ["c", "a"]),  # c's heap entry predates a's snooze
+        (at(17, 9), ["c", "a"]),  # not recorded: back the next day
+    ]
+    assert fired == expected, fired
+    assert not pending_syncs, "syncs were not applied"
+    assert max(clock.sleeps) <= DueScheduler.RESYNC_SECONDS, max(clock.sleeps)
+    assert scheduler.next_wakeup() == at(18, 9)
+
+    # A payment moves a to next month; b is now first in line
+    scheduler.apply_changes({RECURRING_TABLE: ([dict(RECURRING[0], last_recorded_date="2025-10-17")], [])})
+    scheduler.apply_changes({ONE_TIME_TABLE: ([dict(ONE_TIME[0], is_completed=True)], [])})
+    assert scheduler.next_wakeup() == at(19, 9), scheduler.next_wakeup()
+    assert [item.id for _t, item in scheduler.pop_due(at(19, 9))] == ["b"]
+    print(f"scheduler: {len(fired)} wakeups with reminders, {len(clock.sleeps)} sleeps, order as expected")
+
+
+if __name__ == "__main__":
+    main()
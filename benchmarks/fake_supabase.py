@@ -0,0 +1,382 @@
+# benchmarks/fake_supabase.py
+"""
+In-process stand-in for the slice of the supabase-py client used by reminder_core.
+
+Supports table(...).select/insert/update/upsert/delete with eq/neq/lt/lte/gt/gte/
+in_/is_/ilike/not_/or_/order/limit/range and execute(), including PostgREST
+or=/and= filter strings. Every execute() counts as one round trip; an optional
+fixed latency is slept per call, and `fail_with` makes every call raise.
+Round trips are also reported to metrics like the real HTTP client's hook.
+FakeAsyncSupabase wraps it for async callers (awaited execute()).
+"""
+import fnmatch
+import json
+import threading
+import time
+import uuid
+
+from metrics import record_round_trip
+
+
+class FakeResponse:
+    """Mimics postgrest's APIResponse: rows in .data."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeSupabase:
+    """Tables are plain lists of row dicts; counters record round trips, rows and bytes returned."""
+
+    def __init__(self, tables=None, latency=0.0):
+        self.tables = {name: [dict(r) for r in rows] for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.round_trips = 0
+        self.rows_sent = 0
+        self.bytes_sent = 0
+        self.requests = []
+        self.fail_with = None
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def reset_counters(self):
+        self.round_trips = 0
+        self.rows_sent = 0
+        self.bytes_sent = 0
+        self.requests = []
+
+
+# -----------------------------
+# FILTER EVALUATION
+# -----------------------------
+def _coerce(cell, raw):
+    if isinstance(raw, str):
+        if raw == "null":
+            return None
+        if isinstance(cell, bool) or raw in ("true", "false"):
+            return raw == "true" if raw in ("true", "false") else raw
+        if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+            try:
+                return type(cell)(raw)
+            except ValueError:
+                return raw
+    return raw
+
+
+def _compare(op, cell, raw):
+    if op == "is":
+        value = _coerce(cell, raw) if isinstance(raw, str) else raw
+        return cell is value or cell == value and type(cell) is type(value)
+    if op == "in":
+        if not isinstance(raw, (set, frozenset)):
+            raw = _in_values(raw)
+        return str(cell) in raw
+    if cell is None:
+        return False
+    value = _coerce(cell, raw)
+    if op in ("like", "ilike"):
+        pattern = str(value).replace("*", "%").replace("%", "*")
+        if op == "ilike":
+            return fnmatch.fnmatchcase(str(cell).lower(), pattern.lower())
+        return fnmatch.fnmatchcase(str(cell), pattern)
+    if isinstance(value, str) and not isinstance(cell, str):
+        cell = str(cell)
+    if op == "eq":
+        return cell == value
+    if op == "neq":
+        return cell != value
+    if op == "lt":
+        return cell < value
+    if op == "lte":
+        return cell <= value
+    if op == "gt":
+        return cell > value
+    if op == "gte":
+        return cell >= value
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _in_values(raw):
+    """Set of string forms for an in_() list or a PostgREST "(a,b,c)" literal."""
+    if isinstance(raw, str):
+        raw = [v.strip('"') for v in raw.strip("()").split(",")]
+    return frozenset(str(v) for v in raw)
+
+
+def _split_top(text):
+    parts, depth, buf = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return parts
+
+
+def parse_logic(text):
+    """Turn a PostgREST or/and expression body into a predicate over a row."""
+    text = text.strip()
+    for kind, combine in (("and(", all), ("or(", any), ("not.and(", None), ("not.or(", None)):
+        if text.startswith(kind) and text.endswith(")"):
+            inner = [parse_logic(p) for p in _split_top(text[len(kind):-1])]
+            if kind.startswith("not."):
+                comb = all if "and(" in kind else any
+                return lambda row, inner=inner, comb=comb: not comb(p(row) for p in inner)
+            return lambda row, inner=inner, combine=combine: combine(p(row) for p in inner)
+    column, rest = text.split(".", 1)
+    negate = False
+    if rest.startswith("not."):
+        negate, rest = True, rest[4:]
+    op, raw = rest.split(".", 1)
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        raw = raw[1:-1]
+    if op == "in":
+        raw = _in_values(raw)
+
+    def predicate(row):
+        result = _compare(op, row.get(column), raw)
+        return not result if negate else result
+    return predicate
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = 0
+        self.count_mode = None
+        self.on_conflict = "id"
+        self._negate = False
+
+    # builders ------------------------------------------------------------
+    def select(self, columns="*", count=None):
+        self.columns = columns
+        self.count_mode = count
+        return self
+
+    def insert(self, data, **kwargs):
+        self.action, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict="id", **kwargs):
+        self.action, self.payload, self.on_conflict = "upsert", data, on_conflict
+        return self
+
+    def update(self, data, **kwargs):
+        self.action, self.payload = "update", data
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def _add(self, op, column, value):
+        negate, self._negate = self._negate, False
+        self.filters.append(lambda row: _compare(op, row.get(column), value) != negate)
+        return self
+
+    def eq(self, column, value):
+        return self._add("eq", column, value)
+
+    def neq(self, column, value):
+        return self._add("neq", column, value)
+
+    def lt(self, column, value):
+        return self._add("lt", column, value)
+
+    def lte(self, column, value):
+        return self._add("lte", column, value)
+
+    def gt(self, column, value):
+        return self._add("gt", column, value)
+
+    def gte(self, column, value):
+        return self._add("gte", column, value)
+
+    def ilike(self, column, value):
+        return self._add("ilike", column, value)
+
+    def in_(self, column, values):
+        return self._add("in", column, _in_values(list(values)))
+
+    def is_(self, column, value):
+        return self._add("is", column, value)
+
+    def or_(self, filters):
+        predicate = parse_logic(f"or({filters})")
+        negate, self._negate = self._negate, False
+        self.filters.append(lambda row: predicate(row) != negate)
+        return self
+
+    def order(self, column, desc=False, nullsfirst=None):
+        # PostgreSQL's default: NULLS LAST ascending, NULLS FIRST descending
+        self.ordering.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def range(self, start, end):
+        self.row_offset, self.row_limit = start, end - start + 1
+        return self
+
+    # execution -----------------------------------------------------------
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def _project(self, row):
+        if self.columns in (None, "*"):
+            return dict(row)
+        return {c: row.get(c) for c in self.columns.split(",")}
+
+    def execute(self):
+        client = self.client
+        if client.latency:
+            time.sleep(client.latency)
+        with client._lock:
+            client.round_trips += 1
+            client.requests.append((self.table_name, self.action))
+            if client.fail_with is not None:
+                raise client.fail_with
+            rows = client.tables.setdefault(self.table_name, [])
+            data, matched = self._run(rows)
+            nbytes = len(json.dumps(data, default=str))
+            client.rows_sent += len(data)
+            client.bytes_sent += nbytes
+        record_round_trip(nbytes)
+        return FakeResponse(data, count=matched if self.count_mode else None)
+
+    def _run(self, rows):
+        if self.action == "select":
+            matched = [r for r in rows if self._matches(r)]
+            for column, desc, nullsfirst in reversed(self.ordering):
+                matched.sort(key=lambda r: ((r.get(column) is None) == (nullsfirst == desc), r.get(column)),
+                             reverse=desc)
+            end = None if self.row_limit is None else self.row_offset + self.row_limit
+            return [self._project(r) for r in matched[self.row_offset:end]], len(matched)
+        if self.action in ("insert", "upsert"):
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            out = []
+            index = {r.get(self.on_conflict): r for r in rows} if self.action == "upsert" else {}
+            for data in new_rows:
+                row = dict(data)
+                row.setdefault("id", str(uuid.uuid4()))
+                existing = index.get(row.get(self.on_conflict))
+                if existing is not None:
+                    existing.update(row)
+                    out.append(dict(existing))
+                else:
+                    rows.append(row)
+                    out.append(dict(row))
+            return out, len(out)
+        if self.action == "update":
+            out = []
+            for r in rows:
+                if self._matches(r):
+                    r.update(self.payload)
+                    out.append(dict(r))
+            return out, len(out)
+        if self.action == "delete":
+            keep, out = [], []
+            for r in rows:
+                (out if self._matches(r) else keep).append(r)
+            rows[:] = keep
+            return [dict(r) for r in out], len(out)
+        raise ValueError(self.action)
+
+
+# -----------------------------
+# ASYNC FACADE
+# -----------------------------
+class InFlight:
+    """Requests currently awaiting an answer, and the most seen at once; may be shared by several fakes."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        self.current -= 1
+
+
+class FakeAsyncSupabase:
+    """Async client over a FakeSupabase: execute() is awaited and latency is an asyncio.sleep.
+
+    in_flight / max_in_flight record how many requests overlapped, to check concurrency
+    limits. Pass one InFlight as `counter` to several fakes to measure them together.
+    """
+
+    def __init__(self, tables=None, latency=0.0, counter=None):
+        self.backend = FakeSupabase(tables)
+        self.latency = latency
+        self.counter = counter or InFlight()
+
+    def table(self, name):
+        return FakeAsyncQuery(self, self.backend.table(name))
+
+    @property
+    def in_flight(self):
+        return self.counter.current
+
+    @property
+    def max_in_flight(self):
+        return self.counter.peak
+
+    @property
+    def round_trips(self):
+        return self.backend.round_trips
+
+
+class FakeAsyncQuery:
+    def __init__(self, client, query):
+        self._client = client
+        self._query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if isinstance(attr, FakeQuery):  # the not_ property
+            return FakeAsyncQuery(self._client, attr)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return FakeAsyncQuery(self._client, result) if isinstance(result, FakeQuery) else result
+        return call
+
+    async def execute(self):
+        import asyncio
+        client = self._client
+        client.counter.enter()
+        try:
+            if client.latency:
+                await asyncio.sleep(client.latency)
+            return self._query.execute()
+        finally:
+            client.counter.exit()
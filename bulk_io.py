@@ -0,0 +1,307 @@
+# bulk_io.py
+"""
+Streaming import/export of reminders as CSV or JSON lines.
+
+Import reads the file one record at a time and validates it: frequency against
+FREQUENCY_DAYS, dates with parse_iso_date. Valid rows are routed to
+recurring_payments, or to one_time_reminders for frequency "one-time" or rows
+with only a reminder_date. Rows are upserted in multi-row batches, so memory
+stays bounded by the batch size. Every row gets an id derived from the file
+and record number (or keeps its own "id" column), so a batch sent twice, or a
+whole re-import, updates rows instead of duplicating them. After each batch
+the record count is saved to <file>.progress; --resume continues from there.
+
+Export pages through a table in id order and appends each page to the output;
+--resume continues after the last exported id.
+
+    python bulk_io.py import reminders.csv [--table recurring|one-time] [--batch 500] [--resume]
+    python bulk_io.py export out.jsonl --table recurring [--page 1000] [--resume]
+"""
+import os
+import sys
+import csv
+import json
+import uuid
+import argparse
+from reminder_core import (
+    init_supabase,
+    parse_iso_date,
+    FREQUENCY_DAYS,
+    RECURRING_COLUMNS,
+    ONE_TIME_COLUMNS,
+    recurring_payment_row,
+    one_time_reminder_row,
+    iter_table_pages,
+    stored_next_due,
+    NEXT_DUE_COLUMN
+)
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+from resilience import run_request
+from config import setup_logging
+
+logger = setup_logging("bulk_io")
+
+BATCH_SIZE = 500
+PAGE_SIZE = 1000
+DEFAULT_GROUP = "ДОМАКИНСТВО"
+TABLE_ALIASES = {"recurring": RECURRING_TABLE, "one-time": ONE_TIME_TABLE}
+EXPORT_COLUMNS = {RECURRING_TABLE: RECURRING_COLUMNS, ONE_TIME_TABLE: ONE_TIME_COLUMNS}
+TRUE_STRINGS = {"1", "true", "yes", "y", "t"}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+# -----------------------------
+# FILE FORMATS
+# -----------------------------
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_records(path, fmt):
+    """Yield (record_number, record) one at a time; blank JSONL lines are skipped but still counted.
+
+    A JSONL line that doesn't parse is yielded as None so the importer can reject it.
+    """
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+    else:
+        # utf-8-sig strips the BOM spreadsheet exports start with
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for number, record in enumerate(csv.DictReader(f), 1):
+                yield number, record
+
+
+# -----------------------------
+# VALIDATION
+# -----------------------------
+def _text(record, key):
+    value = record.get(key)
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _amount(record):
+    raw = _text(record, "amount").replace(",", ".")
+    try:
+        return float(raw)
+    except ValueError:
+        raise InvalidRecord(f"invalid amount {raw!r}")
+
+
+def _flag(record, key, default):
+    value = record.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_STRINGS
+
+
+def _date(record, key, required):
+    raw = _text(record, key)
+    if not raw:
+        if required:
+            raise InvalidRecord(f"missing {key}")
+        return None
+    parsed = parse_iso_date(raw)
+    if parsed is None:
+        raise InvalidRecord(f"invalid {key} {raw!r}")
+    return parsed
+
+
+def record_table(record, forced_table=None):
+    if forced_table:
+        return forced_table
+    freq = _text(record, "frequency").lower()
+    if freq == "one-time" or (not freq and _text(record, "reminder_date")):
+        return ONE_TIME_TABLE
+    return RECURRING_TABLE
+
+
+def validate_record(record, table):
+    """Turn one input record into an insert row for `table`; raises InvalidRecord."""
+    if not isinstance(record, dict):
+        raise InvalidRecord("not a JSON object")
+    name = _text(record, "name")
+    if not name:
+        raise InvalidRecord("missing name")
+    amount = _amount(record)
+    group = _text(record, "group_name") or DEFAULT_GROUP
+
+    if table == ONE_TIME_TABLE:
+        row = one_time_reminder_row(name, amount, _date(record, "reminder_date", required=True), group)
+        row["is_completed"] = _flag(record, "is_completed", False)
+        return row
+
+    freq = _text(record, "frequency").lower()
+    if freq not in FREQUENCY_DAYS and not freq.isdigit():
+        raise InvalidRecord(f"invalid frequency {freq!r}")
+    day = _text(record, "day_of_month")
+    if day:
+        if not day.isdigit() or not 1 <= int(day) <= 31:
+            raise InvalidRecord(f"invalid day_of_month {day!r}")
+        day = int(day)
+    row = recurring_payment_row(name, amount, freq, day or None, group)
+    # Every row in a batch needs the same keys for a multi-row insert
+    last = _date(record, "last_recorded_date", required=False)
+    row["last_recorded_date"] = last.isoformat() if last else None
+    row["is_active"] = _flag(record, "is_active", True)
+    if NEXT_DUE_COLUMN:
+        row["next_due_date"] = stored_next_due(row)
+    return row
+
+
+# -----------------------------
+# PROGRESS
+# -----------------------------
+def _progress_path(path):
+    return path + ".progress"
+
+
+def load_progress(path):
+    try:
+        with open(_progress_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_progress(path, state):
+    tmp = _progress_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, _progress_path(path))
+
+
+def clear_progress(path):
+    try:
+        os.remove(_progress_path(path))
+    except OSError:
+        pass
+
+
+# -----------------------------
+# IMPORT
+# -----------------------------
+def import_file(supabase, path, fmt=None, table=None, batch_size=BATCH_SIZE, resume=False):
+    """Stream `path` into Supabase. Returns {"imported", "rejected", "skipped"} counts."""
+    fmt = detect_format(path, fmt)
+    done = load_progress(path).get("records", 0) if resume else 0
+    if done:
+        logger.info("Resuming %s after record %d", path, done)
+    # Stable ids make a re-sent batch an update, not a duplicate
+    namespace = uuid.uuid5(uuid.NAMESPACE_URL, os.path.abspath(path))
+    pending = {RECURRING_TABLE: [], ONE_TIME_TABLE: []}
+    stats = {"imported": 0, "rejected": 0, "skipped": done}
+    last_number = done
+
+    def flush():
+        for target, rows in pending.items():
+            if rows:
+                # Deterministic ids make the upsert safe to retry
+                run_request(supabase.table(target).upsert(rows, on_conflict="id"), idempotent=True)
+                stats["imported"] += len(rows)
+                rows.clear()
+        save_progress(path, {"records": last_number})
+
+    for number, record in iter_records(path, fmt):
+        if number <= done:
+            continue
+        last_number = number
+        try:
+            target = record_table(record, table) if isinstance(record, dict) else RECURRING_TABLE
+            row = validate_record(record, target)
+        except InvalidRecord as e:
+            stats["rejected"] += 1
+            logger.warning("%s record %d rejected: %s", path, number, e)
+            continue
+        row["id"] = _text(record, "id") or str(uuid.uuid5(namespace, str(number)))
+        pending[target].append(row)
+        if len(pending[RECURRING_TABLE]) + len(pending[ONE_TIME_TABLE]) >= batch_size:
+            flush()
+    flush()
+    clear_progress(path)
+    logger.info("Imported %s: %d rows, %d rejected", path, stats["imported"], stats["rejected"])
+    return stats
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def export_table(supabase, table, path, fmt=None, page_size=PAGE_SIZE, resume=False):
+    """Write `table` to `path` page by page. Returns the number of rows written."""
+    fmt = detect_format(path, fmt)
+    columns = EXPORT_COLUMNS[table]
+    fieldnames = columns.split(",")
+    after_id = load_progress(path).get("last_id") if resume and os.path.exists(path) else None
+    written = 0
+
+    with open(path, "a" if after_id is not None else "w", encoding="utf-8", newline="") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            if after_id is None:
+                writer.writeheader()
+        for page in iter_table_pages(supabase, table, columns, page_size, after_id):
+            if writer is not None:
+                writer.writerows(page)
+            else:
+                f.writelines(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in page)
+            f.flush()
+            written += len(page)
+            save_progress(path, {"last_id": page[-1]["id"]})
+    clear_progress(path)
+    logger.info("Exported %d %s rows to %s", written, table, path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of reminders (CSV or JSON lines).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="load reminders from a file")
+    p_import.add_argument("path")
+    p_import.add_argument("--table", choices=TABLE_ALIASES, help="force every row into one table")
+    p_import.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per insert request")
+
+    p_export = sub.add_parser("export", help="write a table to a file")
+    p_export.add_argument("path")
+    p_export.add_argument("--table", choices=TABLE_ALIASES, required=True)
+    p_export.add_argument("--page", type=int, default=PAGE_SIZE, help="rows per read request")
+
+    for p in (p_import, p_export):
+        p.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+        p.add_argument("--resume", action="store_true", help="continue from the saved progress")
+
+    args = parser.parse_args(argv)
+    supabase = init_supabase(probe=False, rest_only=True)
+    table = TABLE_ALIASES.get(args.table)
+    try:
+        if args.command == "import":
+            stats = import_file(supabase, args.path, args.format, table, args.batch, args.resume)
+            print(f"Imported {stats['imported']}, rejected {stats['rejected']}, skipped {stats['skipped']} already done.")
+        else:
+            count = export_table(supabase, table, args.path, args.format, args.page, args.resume)
+            print(f"Exported {count} rows.")
+    except Exception:
+        logger.exception("%s of %s stopped.", args.command.capitalize(), args.path)
+        print("Stopped; progress is saved, re-run with --resume to continue.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
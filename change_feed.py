@@ -0,0 +1,344 @@
+# change_feed.py
+"""
+Realtime change feed for recurring_payments and one_time_reminders.
+
+A ChangeFeed takes insert/update/delete events from an event source and
+applies them on one consumer thread. They go into a ReminderIndex, an
+in-memory set of rows keyed by id and group with the same read API as
+LocalMirror, and optionally write through to the mirror. The scheduler,
+notifier and GUI can then read current data without querying Supabase.
+Changes also accumulate in the {table: (changed, deleted)} form that
+DueScheduler.apply_changes takes.
+
+Event sources:
+- SupabaseRealtimeSource: Supabase Realtime (postgres_changes). Needs the
+  tables added to the supabase_realtime publication.
+- LocalEventSource: push() events by hand, for tests and local tools.
+"""
+import queue
+import asyncio
+import logging
+import threading
+from datetime import date
+from reminder_core import SUPABASE_URL, SUPABASE_KEY, recurring_due_mask, parse_iso_date
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE, is_active_row
+
+logger = logging.getLogger("change_feed")
+
+TABLES = (RECURRING_TABLE, ONE_TIME_TABLE)
+INSERT, UPDATE, DELETE = "INSERT", "UPDATE", "DELETE"
+RESYNC = "RESYNC"  # source (re)connected: events may have been missed, reload a snapshot
+
+
+class ReminderIndex:
+    """Rows by (table, id) with a per-group id index; safe to read from any thread."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rows = {table: {} for table in TABLES}
+        self._groups = {table: {} for table in TABLES}
+        self.version = 0
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(rows) for rows in self._rows.values())
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    def _unlink(self, table, key):
+        old = self._rows[table].pop(key, None)
+        if old is not None:
+            members = self._groups[table].get(old.get("group_name"))
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._groups[table][old.get("group_name")]
+        return old
+
+    def _link(self, table, key, row):
+        self._rows[table][key] = row
+        self._groups[table].setdefault(row.get("group_name"), set()).add(key)
+
+    def load(self, table, rows):
+        """Replace everything held for `table`."""
+        with self._lock:
+            self._rows[table], self._groups[table] = {}, {}
+            for row in rows:
+                self._link(table, str(row["id"]), dict(row))
+            self.version += 1
+
+    def upsert(self, table, row):
+        """Insert or merge a row (a partial update keeps the columns it doesn't mention)."""
+        key = str(row["id"])
+        with self._lock:
+            merged = dict(self._rows[table].get(key) or {}, **row)
+            self._unlink(table, key)
+            self._link(table, key, merged)
+            self.version += 1
+            return merged
+
+    def delete(self, table, reminder_id):
+        with self._lock:
+            removed = self._unlink(table, str(reminder_id))
+            if removed is not None:
+                self.version += 1
+            return removed
+
+    # -----------------------------
+    # READS (same shape as LocalMirror)
+    # -----------------------------
+    def ids(self, table):
+        with self._lock:
+            return set(self._rows[table])
+
+    def get_row(self, table, reminder_id):
+        with self._lock:
+            row = self._rows[table].get(str(reminder_id))
+            return dict(row) if row is not None else None
+
+    def _select(self, table, group_name=None):
+        with self._lock:
+            if group_name:
+                keys = self._groups[table].get(group_name, ())
+                rows = [self._rows[table][k] for k in keys]
+            else:
+                rows = list(self._rows[table].values())
+        return [dict(r) for r in rows if is_active_row(table, r)]
+
+    def get_active_reminders(self, group_name=None):
+        return self._select(RECURRING_TABLE, group_name)
+
+    def get_active_one_time(self, group_name=None):
+        return self._select(ONE_TIME_TABLE, group_name)
+
+    def get_due_recurring_reminders(self, today=None):
+        if today is None:
+            today = date.today()
+        rows = self._select(RECURRING_TABLE)
+        return [r for r, due in zip(rows, recurring_due_mask(rows, today)) if due]
+
+    def get_due_one_time_reminders(self, today=None):
+        if today is None:
+            today = date.today()
+        due = []
+        for r in self._select(ONE_TIME_TABLE):
+            reminder_date = parse_iso_date(r.get("reminder_date"))
+            if reminder_date and reminder_date <= today:
+                due.append(r)
+        return due
+
+    def get_due_reminders(self, today=None):
+        return self.get_due_recurring_reminders(today) + self.get_due_one_time_reminders(today)
+
+
+# -----------------------------
+# EVENT SOURCES
+# -----------------------------
+class LocalEventSource:
+    """In-process source: events pushed here are delivered to the feed in order."""
+
+    def __init__(self):
+        self._emit = None
+        self._backlog = []
+
+    def start(self, emit):
+        self._emit = emit
+        for event in self._backlog:
+            emit(event)
+        self._backlog = []
+
+    def stop(self):
+        self._emit = None
+
+    def push(self, table, event_type, record=None, old_record=None):
+        event = (table, event_type, record, old_record)
+        if self._emit is None:
+            self._backlog.append(event)
+        else:
+            self._emit(event)
+
+    def resync(self):
+        self.push(None, RESYNC)
+
+
+class SupabaseRealtimeSource:
+    """postgres_changes events from Supabase Realtime, received on a private asyncio loop thread."""
+
+    def __init__(self, url=SUPABASE_URL, key=SUPABASE_KEY, tables=TABLES):
+        self.url = url
+        self.key = key
+        self.tables = tables
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._stopping = None
+
+    def start(self, emit):
+        # realtime is only needed here; keep it out of every other entry point's import time
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        endpoint = self.url.rstrip("/").replace("https://", "wss://").replace("http://", "ws://") + "/realtime/v1"
+        self._loop = asyncio.new_event_loop()
+        self._stopping = asyncio.Event()
+
+        def on_change(payload):
+            data = payload.get("data", payload)
+            emit((data.get("table"), str(getattr(data.get("type"), "value", data.get("type"))),
+                  data.get("record"), data.get("old_record")))
+
+        def on_state(state, error):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                # Also fires after an automatic reconnect: anything missed meanwhile needs a reload
+                emit((None, RESYNC, None, None))
+            elif error is not None:
+                logger.warning("Realtime channel %s: %s", state, error)
+
+        async def run():
+            self._client = AsyncRealtimeClient(endpoint, self.key)
+            await self._client.connect()
+            channel = self._client.channel("reminders")
+            for table in self.tables:
+                channel.on_postgres_changes("*", on_change, table=table, schema="public")
+            await channel.subscribe(on_state)
+            # listen() is a no-op in realtime 2.x: messages are read by the client's own socket
+            # task, which only runs while this loop does, so stay here until stop()
+            try:
+                await self._stopping.wait()
+            finally:
+                await self._client.close()
+
+        def target():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(run())
+            except Exception:
+                logger.exception("Realtime listener stopped.")
+            finally:
+                # Join/heartbeat timers the client leaves behind
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=target, name="realtime", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is None or self._thread is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        except RuntimeError:
+            pass  # the listener already ended (and logged why)
+        self._thread.join(timeout=5)
+
+
+def mirror_loader(mirror, supabase):
+    """Loader that catches the mirror up with Supabase, then returns its active rows."""
+    def load():
+        mirror.sync(supabase)
+        return {RECURRING_TABLE: mirror.get_active_reminders(), ONE_TIME_TABLE: mirror.get_active_one_time()}
+    return load
+
+
+# -----------------------------
+# CONSUMER
+# -----------------------------
+class ChangeFeed:
+    """Apply a source's events to a ReminderIndex (and optionally a LocalMirror) on one thread.
+
+    loader() returns {table: rows}; it fills the index at start and after every RESYNC.
+    """
+
+    def __init__(self, index, source, loader=None, mirror=None):
+        self.index = index
+        self.source = source
+        self.loader = loader
+        self.mirror = mirror
+        self._events = queue.Queue()
+        self._changed = threading.Condition()
+        self._pending = {}
+        self._thread = None
+
+    def start(self):
+        self.reload()
+        self._thread = threading.Thread(target=self._consume, name="change-feed", daemon=True)
+        self._thread.start()
+        self.source.start(self._events.put)
+        return self
+
+    def stop(self):
+        self.source.stop()
+        self._events.put(None)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def reload(self):
+        if self.loader is None:
+            return
+        snapshot = self.loader()
+        # Everything may have changed: hand the full sets, and whatever vanished, to whoever drains changes
+        with self._changed:
+            for table, rows in snapshot.items():
+                fresh = {str(r["id"]): r for r in rows}
+                gone = self.index.ids(table) - set(fresh)
+                self.index.load(table, rows)
+                self._pending[table] = (fresh, gone)
+            self._changed.notify_all()
+
+    def _consume(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            try:
+                self.apply(*event)
+            except Exception:
+                logger.exception("Could not apply change event %s", event[:2])
+
+    def apply(self, table, event_type, record=None, old_record=None):
+        """Apply one event to the index; returns the row now held, or None after a delete."""
+        if event_type == RESYNC:
+            self.reload()
+            return None
+        if table not in TABLES:
+            return None
+        if event_type == DELETE:
+            reminder_id = str((old_record or record or {}).get("id"))
+            self.index.delete(table, reminder_id)
+            if self.mirror is not None:
+                self.mirror.delete_ids(table, [reminder_id])
+            self._note(table, deleted=reminder_id)
+            return None
+        row = self.index.upsert(table, record or {})
+        if self.mirror is not None:
+            self.mirror.upsert_rows(table, [row])
+        self._note(table, changed=row)
+        return row
+
+    def _note(self, table, changed=None, deleted=None):
+        with self._changed:
+            rows, removed = self._pending.setdefault(table, ({}, set()))
+            if changed is not None:
+                key = str(changed["id"])
+                rows[key] = changed
+                removed.discard(key)
+            if deleted is not None:
+                rows.pop(deleted, None)
+                removed.add(deleted)
+            self._changed.notify_all()
+
+    def drain_changes(self):
+        """Changes since the last call, as {table: (changed_rows, deleted_ids)}."""
+        with self._changed:
+            pending, self._pending = self._pending, {}
+        return {table: (list(rows.values()), sorted(removed)) for table, (rows, removed) in pending.items()}
+
+    def wait(self, timeout=None):
+        """Sleep up to `timeout` seconds, waking early when a change arrives. Usable as a scheduler sleep."""
+        with self._changed:
+            if not self._pending:
+                self._changed.wait(timeout)
+            return bool(self._pending)
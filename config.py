@@ -1,21 +1,77 @@
 # config.py
 import os
 import sys
+import json
+import queue
+import atexit
 import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 APP_NAME = "Cash Reminder App"
 ICON_PATH = os.path.join(os.path.dirname(__file__), "icon.ico")
 SPREADSHEET_URL = os.getenv("SPREADSHEET_URL", "https://docs.google.com/spreadsheets/d/1IHH_aGtVvaJqtxQjvnGncM55gTrhCmo9HLv9-hWu-ME/edit?gid=1688809850#gid=1688809850")
 LOG_FILE = os.path.join(os.path.dirname(__file__), "reminder_log.txt")
+MIRROR_DB = os.getenv("REMINDER_MIRROR_DB", os.path.join(os.path.dirname(__file__), "reminder_cache.db"))
+# What has been announced, per reminder and due date (see ledger.py); shares the mirror's file by default
+LEDGER_DB = os.getenv("REMINDER_LEDGER_DB", MIRROR_DB)
+# REMINDER_LIVE=1 keeps the GUI current from the realtime change feed (see change_feed.py)
+LIVE_UPDATES = os.getenv("REMINDER_LIVE", "") == "1"
 
+# Log rotation and format; REMINDER_LOG_FORMAT=json writes one JSON object per line to the file
+LOG_MAX_BYTES = int(os.getenv("REMINDER_LOG_MAX_BYTES", str(1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("REMINDER_LOG_BACKUPS", "5"))
+LOG_FORMAT = os.getenv("REMINDER_LOG_FORMAT", "text").lower()
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
-def setup_logging(name="reminder"):
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[
-            logging.FileHandler(LOG_FILE, encoding="utf-8"),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+_log_listener = None
+_log_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record. QueueHandler has already folded any traceback into the message."""
+
+    def format(self, record):
+        return json.dumps({
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
+
+
+def _stop_logging():
+    global _log_listener
+    with _log_lock:
+        if _log_listener is not None:
+            _log_listener.stop()  # drains the queue before returning
+            _log_listener = None
+
+
+def setup_logging(name="reminder", level=logging.INFO):
+    """Return a logger; the first call installs the process-wide logging pipeline.
+
+    Records go through a QueueHandler so callers (the Tk thread, due checks) never wait
+    on disk; a QueueListener thread writes them to a size-rotated LOG_FILE and stdout.
+    Later calls from other modules reuse the same pipeline instead of adding handlers.
+    """
+    global _log_listener
+    with _log_lock:
+        if _log_listener is None:
+            file_handler = RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+            file_handler.setFormatter(
+                JsonLinesFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+            )
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+            log_queue = queue.SimpleQueue()
+            root = logging.getLogger()
+            root.addHandler(QueueHandler(log_queue))
+            root.setLevel(level)
+            _log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+            _log_listener.start()
+            atexit.register(_stop_logging)
     return logging.getLogger(name)
@@ -0,0 +1,180 @@
+# ledger.py
+"""
+Persistent ledger of announced reminders.
+
+Each announcement is recorded per occurrence: (table, id, due date), with when
+it was first and last announced and whether the user acknowledged it by
+closing the digest. A reminder is announced at most once a day until it is
+acknowledged or recorded; recording moves its due date, which makes a new
+occurrence. A recurring reminder never paid has no due date of its own, so
+its occurrence is keyed UNPAID until the first payment. So cron running hourly, or "Check Due Now" pressed twice, doesn't
+repeat the same notification.
+
+change_token() is a cheap fingerprint of both tables (row count and newest
+updated_at, one single-row request each). If the token and the day match the
+last completed check, nothing can have become due or changed since, and the
+check is skipped without fetching anything. Needs the same updated_at
+trigger as local_store.
+"""
+import json
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from config import LEDGER_DB
+from metrics import instrumented, record_failure
+from resilience import run_request
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+from models import Kind
+
+logger = logging.getLogger("ledger")
+
+KEEP_DAYS = 90  # occurrences not announced for this long are dropped
+CHECK_ONLY = "check"  # ledger check names: the cron check and the notifying paths keep separate tokens
+NOTIFY = "notify"
+UNPAID = "unpaid"  # occurrence key of recurring reminders with no payment recorded yet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notified (
+    tbl TEXT NOT NULL,
+    id TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    first_at TEXT NOT NULL,
+    last_at TEXT NOT NULL,
+    times INTEGER NOT NULL DEFAULT 0,
+    acknowledged INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tbl, id, due_date)
+);
+CREATE TABLE IF NOT EXISTS checks (
+    name TEXT PRIMARY KEY,
+    token TEXT,
+    checked_on TEXT,
+    due_count INTEGER
+);
+"""
+
+
+@instrumented
+def change_token(supabase):
+    """Fingerprint of both tables, or None if it can't be read (callers then do a full check)."""
+    if supabase is None:
+        return None
+    parts = []
+    try:
+        for table in (RECURRING_TABLE, ONE_TIME_TABLE):
+            res = run_request(
+                supabase.table(table).select("updated_at", count="exact")
+                .order("updated_at", desc=True, nullsfirst=False).limit(1),
+                idempotent=True
+            )
+            newest = res.data[0].get("updated_at") if res.data else None
+            parts.append([table, res.count, newest])
+    except Exception as e:
+        logger.warning("Could not read change token (%s); doing a full check.", e)
+        record_failure()
+        return None
+    return json.dumps(parts)
+
+
+def occurrence(item, today=None):
+    """(table, id, due date) identifying one falling-due of a Reminder.
+
+    Never-paid recurring reminders would otherwise be due "today" on every day,
+    which would make each day a new occurrence.
+    """
+    if item.kind is Kind.RECURRING and item.last_recorded_date is None:
+        return item.table, item.id, UNPAID
+    due = item.next_due(today) or today or date.today()
+    return item.table, item.id, due.isoformat()
+
+
+class NotificationLedger:
+    def __init__(self, path=LEDGER_DB, clock=datetime.now):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # -----------------------------
+    # OCCURRENCES
+    # -----------------------------
+    def pending(self, items, today=None):
+        """Items not yet announced today and not acknowledged, in their original order."""
+        if today is None:
+            today = self.clock().date()
+        keys = [occurrence(item, today) for item in items]
+        if not keys:
+            return []
+        earliest = min(k[2] for k in keys)  # ISO dates sort before UNPAID
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT tbl, id, due_date, last_at, acknowledged FROM notified WHERE due_date >= ?", (earliest,)
+            )
+            seen = {(t, i, d): (last_at, ack) for t, i, d, last_at, ack in cur.fetchall()}
+        today_iso = today.isoformat()
+        fresh = []
+        for item, key in zip(items, keys):
+            entry = seen.get(key)
+            if entry is None or (not entry[1] and entry[0][:10] < today_iso):
+                fresh.append(item)
+        return fresh
+
+    def record(self, items, today=None):
+        """Note that `items` were announced now."""
+        now = self.clock()
+        stamp = now.isoformat(timespec="seconds")
+        records = [occurrence(item, today or now.date()) + (stamp, stamp) for item in items]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO notified (tbl, id, due_date, first_at, last_at, times) VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (tbl, id, due_date) DO UPDATE SET last_at = excluded.last_at, times = times + 1",
+                records
+            )
+            cutoff = (now - timedelta(days=KEEP_DAYS)).isoformat(timespec="seconds")
+            self.conn.execute("DELETE FROM notified WHERE last_at < ?", (cutoff,))
+        return len(records)
+
+    def acknowledge(self, items, today=None):
+        """Mark `items` as seen by the user; they stay quiet until their due date moves."""
+        now = self.clock()
+        stamp = now.isoformat(timespec="seconds")
+        records = [occurrence(item, today or now.date()) + (stamp, stamp) for item in items]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO notified (tbl, id, due_date, first_at, last_at, acknowledged) VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (tbl, id, due_date) DO UPDATE SET acknowledged = 1",
+                records
+            )
+        return len(records)
+
+    # -----------------------------
+    # CHECKS
+    # -----------------------------
+    def unchanged(self, name, token, today=None):
+        """True if `token` and the day match the last completed check called `name`."""
+        if token is None:
+            return False
+        if today is None:
+            today = self.clock().date()
+        with self._lock:
+            row = self.conn.execute("SELECT token, checked_on FROM checks WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == token and row[1] == today.isoformat()
+
+    def last_due_count(self, name):
+        with self._lock:
+            row = self.conn.execute("SELECT due_count FROM checks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row and row[0] is not None else 0
+
+    def save_check(self, name, token, today, due_count):
+        """Remember a completed check; a None token (unreadable) clears it so the next check runs in full."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checks (name, token, checked_on, due_count) VALUES (?, ?, ?, ?)",
+                (name, token, today.isoformat(), due_count)
+            )
@@ -0,0 +1,358 @@
+# local_store.py
+"""
+On-disk SQLite mirror of recurring_payments and one_time_reminders.
+
+The GUI and due checks read from the mirror so they start instantly and keep
+working offline. sync() pulls only rows past the last (updated_at, id) watermark,
+re-reading a few seconds before it (SYNC_OVERLAP_SECONDS), plus an id listing to find rows deleted on the server whenever rows changed or
+the row counts disagree. That needs an `updated_at timestamptz` column kept
+current by a trigger on both Supabase tables (UPDATED_AT_SQL;
+backfill_next_due.py --sql prints it). When the column is missing, PostgREST
+rejects the query (42703) and sync falls back to downloading each table in
+full, which also finds deletes.
+"""
+import json
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from config import MIRROR_DB
+from metrics import instrumented, record_failure
+from resilience import run_request
+from reminder_core import recurring_due_mask, parse_iso_date, iter_table_pages, RECURRING_COLUMNS, ONE_TIME_COLUMNS
+
+logger = logging.getLogger("local_store")
+
+RECURRING_TABLE = "recurring_payments"
+ONE_TIME_TABLE = "one_time_reminders"
+TABLE_COLUMNS = {
+    RECURRING_TABLE: RECURRING_COLUMNS,
+    ONE_TIME_TABLE: ONE_TIME_COLUMNS,
+}
+SYNC_PAGE_SIZE = 1000
+# now() in the trigger is the transaction start, so a row can commit after a sync with
+# a stamp below its watermark; each delta query starts this far back to catch it
+SYNC_OVERLAP_SECONDS = 5
+UNDEFINED_COLUMN = "42703"  # PostgreSQL error code PostgREST passes through for an unknown column
+
+UPDATED_AT_SQL = """\
+create or replace function set_updated_at() returns trigger language plpgsql as $$
+begin
+    new.updated_at = now();
+    return new;
+end $$;
+alter table recurring_payments add column if not exists updated_at timestamptz not null default now();
+alter table one_time_reminders add column if not exists updated_at timestamptz not null default now();
+drop trigger if exists recurring_payments_updated_at on recurring_payments;
+create trigger recurring_payments_updated_at before update on recurring_payments
+    for each row execute function set_updated_at();
+drop trigger if exists one_time_reminders_updated_at on one_time_reminders;
+create trigger one_time_reminders_updated_at before update on one_time_reminders
+    for each row execute function set_updated_at();
+create index if not exists recurring_payments_updated_at_id on recurring_payments (updated_at, id);
+create index if not exists one_time_reminders_updated_at_id on one_time_reminders (updated_at, id);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    tbl TEXT NOT NULL,
+    id TEXT NOT NULL,
+    group_name TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tbl, id)
+);
+CREATE INDEX IF NOT EXISTS rows_active_group ON rows (tbl, active, group_name);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tbl TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_sync TEXT
+);
+"""
+
+
+def is_missing_column(error):
+    """Whether a PostgREST error is "column does not exist"."""
+    return str(getattr(error, "code", "") or "") == UNDEFINED_COLUMN
+
+
+def overlap_start(updated_at):
+    """The timestamp SYNC_OVERLAP_SECONDS before `updated_at` (unchanged if it doesn't parse)."""
+    try:
+        stamp = datetime.fromisoformat(str(updated_at).replace("Z", "+00:00"))
+    except ValueError:
+        return updated_at
+    return (stamp - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+
+def is_active_row(table, row):
+    """Whether a row belongs in the active lists: recurring not deactivated, one-time not completed.
+
+    NULL flags count as active / open here and in the server-side filters (reminder_core).
+    """
+    if table == ONE_TIME_TABLE:
+        return not row.get("is_completed")
+    return row.get("is_active") is not False
+
+
+class LocalMirror:
+    def __init__(self, path=MIRROR_DB):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # Set by WriteQueue so unsent local writes survive a sync
+        self.write_queue = None
+        # Cleared once the server turns out to have no updated_at column
+        self.incremental = True
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    def upsert_rows(self, table, rows):
+        """Insert or replace rows (dicts with an `id`) in the mirror."""
+        records = [
+            (table, str(r["id"]), r.get("group_name"), int(is_active_row(table, r)),
+             r.get("updated_at"), json.dumps(r, default=str))
+            for r in rows if r.get("id") is not None
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO rows (tbl, id, group_name, active, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                records
+            )
+        return len(records)
+
+    def update_row(self, table, reminder_id, changes):
+        """Merge `changes` into a mirrored row; returns the new row or None if absent."""
+        row = self.get_row(table, reminder_id)
+        if row is None:
+            return None
+        row.update(changes)
+        self.upsert_rows(table, [row])
+        return row
+
+    def delete_ids(self, table, ids):
+        ids = [str(i) for i in ids]
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM rows WHERE tbl = ? AND id = ?", [(table, i) for i in ids])
+        return len(ids)
+
+    # -----------------------------
+    # READS
+    # -----------------------------
+    def _select(self, table, active_only=True, group_name=None):
+        sql = "SELECT data FROM rows WHERE tbl = ?"
+        params = [table]
+        if active_only:
+            sql += " AND active = 1"
+        if group_name:
+            sql += " AND group_name = ?"
+            params.append(group_name)
+        with self._lock:
+            cur = self.conn.execute(sql + " ORDER BY rowid", params)
+            return [json.loads(data) for (data,) in cur.fetchall()]
+
+    def get_row(self, table, reminder_id):
+        with self._lock:
+            cur = self.conn.execute("SELECT data FROM rows WHERE tbl = ? AND id = ?", (table, str(reminder_id)))
+            found = cur.fetchone()
+        return json.loads(found[0]) if found else None
+
+    def get_active_reminders(self, group_name=None):
+        """Active recurring reminders, optionally filtered by group."""
+        return self._select(RECURRING_TABLE, group_name=group_name)
+
+    def get_active_one_time(self, group_name=None):
+        """Uncompleted one-time reminders, optionally filtered by group."""
+        return self._select(ONE_TIME_TABLE, group_name=group_name)
+
+    def get_due_recurring_reminders(self, today=None):
+        if today is None:
+            today = date.today()
+        rows = self._select(RECURRING_TABLE)
+        return [r for r, due in zip(rows, recurring_due_mask(rows, today)) if due]
+
+    def get_due_one_time_reminders(self, today=None):
+        if today is None:
+            today = date.today()
+        due = []
+        for r in self._select(ONE_TIME_TABLE):
+            reminder_date = parse_iso_date(r.get("reminder_date"))
+            if reminder_date and reminder_date <= today:
+                due.append(r)
+        return due
+
+    def get_due_reminders(self, today=None):
+        """Same contract as reminder_core.get_due_reminders, served locally."""
+        return self.get_due_recurring_reminders(today) + self.get_due_one_time_reminders(today)
+
+    def has_data(self):
+        with self._lock:
+            cur = self.conn.execute("SELECT 1 FROM sync_state WHERE last_sync IS NOT NULL LIMIT 1")
+            return cur.fetchone() is not None
+
+    # -----------------------------
+    # SYNC
+    # -----------------------------
+    def watermark(self, table):
+        """(updated_at, id) of the last row pulled for `table`, or None before the first sync."""
+        with self._lock:
+            cur = self.conn.execute("SELECT watermark FROM sync_state WHERE tbl = ?", (table,))
+            found = cur.fetchone()
+        if not found or not found[0]:
+            return None
+        try:
+            updated_at, last_id = json.loads(found[0])
+        except ValueError:
+            # Mirrors written before keyset watermarks stored a bare timestamp
+            updated_at, last_id = found[0], ""
+        return updated_at, last_id
+
+    def _set_watermark(self, table, watermark):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (tbl, watermark, last_sync) VALUES (?, ?, ?)",
+                (table, json.dumps(watermark) if watermark else None, datetime.now(timezone.utc).isoformat())
+            )
+
+    def _iter_changed(self, supabase, table, since):
+        """Yield pages of rows from SYNC_OVERLAP_SECONDS before the (updated_at, id) cursor
+        `since` (all rows when None).
+
+        The first query re-reads the overlap window; later pages continue on (updated_at, id)
+        so rows sharing a timestamp, e.g. from one bulk import, are neither skipped nor
+        fetched twice within a sync.
+        """
+        columns = TABLE_COLUMNS[table] + ",updated_at"
+        cursor = since
+        first = True
+        while True:
+            query = supabase.table(table).select(columns)
+            if cursor:
+                updated_at, last_id = cursor
+                if first:
+                    query = query.gte("updated_at", overlap_start(updated_at))
+                elif last_id:
+                    query = query.or_(
+                        f'updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt."{last_id}")'
+                    )
+                else:
+                    query = query.gte("updated_at", updated_at)
+            page = run_request(query.order("updated_at").order("id").limit(SYNC_PAGE_SIZE), idempotent=True).data or []
+            if page:
+                yield page
+            if len(page) < SYNC_PAGE_SIZE:
+                return
+            cursor = (page[-1]["updated_at"], str(page[-1]["id"]))
+            first = False
+
+    def _unseen(self, table, rows):
+        """Drop rows the mirror already holds at the same updated_at (re-read from the overlap window)."""
+        ids = [str(r["id"]) for r in rows]
+        known = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cur = self.conn.execute(
+                    f"SELECT id, updated_at FROM rows WHERE tbl = ? AND id IN ({','.join('?' * len(chunk))})",
+                    (table, *chunk)
+                )
+                known.update(cur.fetchall())
+        return [r for r in rows if not r.get("updated_at") or known.get(str(r["id"])) != r["updated_at"]]
+
+    def _server_count(self, supabase, table):
+        return run_request(supabase.table(table).select("id", count="exact").limit(1), idempotent=True).count
+
+    def _fetch_ids(self, supabase, table):
+        return {str(r["id"]) for page in iter_table_pages(supabase, table, "id", SYNC_PAGE_SIZE) for r in page}
+
+    def _local_ids(self, table):
+        with self._lock:
+            cur = self.conn.execute("SELECT id FROM rows WHERE tbl = ?", (table,))
+            return {i for (i,) in cur.fetchall()}
+
+    def sync_table(self, supabase, table, on_page=None):
+        """Pull changes for one table. Returns (changed_rows, deleted_ids).
+
+        Each page is stored as soon as it arrives; on_page(table, rows) lets a caller
+        show it before the rest of the table has been downloaded.
+        """
+        if not self.incremental:
+            return self._pull_table(supabase, table, on_page)
+        since = self.watermark(table)
+        changed = []
+        watermark = since
+        try:
+            for page in self._iter_changed(supabase, table, since):
+                stamped = [r for r in page if r.get("updated_at")]
+                if stamped:
+                    newest = (stamped[-1]["updated_at"], str(stamped[-1]["id"]))
+                    watermark = max(watermark, newest) if watermark else newest
+                page = self._unseen(table, page)
+                if page:
+                    self._store_page(table, page, on_page)
+                    changed.extend(page)
+        except Exception as e:
+            if not is_missing_column(e):
+                raise
+            logger.warning("%s has no updated_at column (%s); syncing by full download. "
+                           "Run the SQL from `backfill_next_due.py --sql` to enable delta sync.", table, e)
+            self.incremental = False
+            return self._pull_table(supabase, table, on_page)
+
+        # Server-side deletes don't touch updated_at. With nothing pulled, a delete can only show
+        # as a count mismatch; once anything changed, an insert can hide a delete, so list ids
+        local_ids = self._local_ids(table)
+        deleted = set()
+        if changed or self._server_count(supabase, table) != len(local_ids):
+            deleted = local_ids - self._fetch_ids(supabase, table)
+            self.delete_ids(table, deleted)
+
+        self._set_watermark(table, watermark)
+        return changed, deleted
+
+    def _pull_table(self, supabase, table, on_page=None):
+        """Download `table` in full; rows missing from the download were deleted on the server."""
+        changed = []
+        for page in iter_table_pages(supabase, table, TABLE_COLUMNS[table], SYNC_PAGE_SIZE):
+            self._store_page(table, page, on_page)
+            changed.extend(page)
+        deleted = self._local_ids(table) - {str(r["id"]) for r in changed}
+        self.delete_ids(table, deleted)
+        self._set_watermark(table, None)
+        return changed, deleted
+
+    def _store_page(self, table, page, on_page):
+        self.upsert_rows(table, page)
+        if on_page is not None:
+            if self.write_queue is not None:
+                self.write_queue.replay(self)
+            on_page(table, page)
+
+    @instrumented
+    def sync(self, supabase, on_page=None):
+        """Delta-sync both tables. Returns {table: (changed_rows, deleted_ids)} or None on failure."""
+        if supabase is None:
+            return None
+        result = {}
+        try:
+            for table in (RECURRING_TABLE, ONE_TIME_TABLE):
+                result[table] = self.sync_table(supabase, table, on_page)
+        except Exception:
+            logger.exception("Mirror sync failed; serving cached data.")
+            record_failure()
+            return None
+        finally:
+            if self.write_queue is not None:
+                self.write_queue.replay(self)
+        logger.info("Mirror synced (recurring=%d changed, one_time=%d changed)",
+                    len(result[RECURRING_TABLE][0]), len(result[ONE_TIME_TABLE][0]))
+        return result
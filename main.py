@@ -1,12 +1,18 @@
+import time
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from reminder_core import (
-    init_supabase, add_recurring_payment, add_one_time_reminder,
-    get_due_reminders, get_active_reminders, delete_reminder, get_active_one_time
-)
-from notifier import show_due_popups
-from config import setup_logging
+from reminder_core import init_supabase
+from notifier import show_due_popups, DueSnapshot
+from local_store import LocalMirror, RECURRING_TABLE, ONE_TIME_TABLE
+from models import Reminder, Kind
+from write_queue import WriteQueue
+from ledger import NotificationLedger
+from change_feed import ChangeFeed, ReminderIndex, SupabaseRealtimeSource, mirror_loader
+from resilience import backend_breaker, OPEN, CLOSED
+from config import setup_logging, LIVE_UPDATES
 
 logger = setup_logging("main")
 
@@ -19,7 +25,29 @@ GROUP_NAMES = [
 FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "yearly", "one-time"]
 
 
+def tree_iid(table, reminder_id):
+    """Treeview item id for a row: table and database id, so duplicate names can't collide."""
+    return f"{table}:{reminder_id}"
+
+
+def parse_tree_iid(iid):
+    """Inverse of tree_iid; returns (table, id) or None for placeholder rows."""
+    table, sep, reminder_id = iid.partition(":")
+    if not sep or table not in (RECURRING_TABLE, ONE_TIME_TABLE):
+        return None
+    return table, reminder_id
+
+
 class ReminderApp:
+    POLL_MS = 50  # how often the Tk loop checks background DB work for results
+    PAGE_SIZE = 500  # rows drawn into the Treeview at a time; "Show more" extends the window
+    BREAKER_POLL_MS = 250  # how quickly the offline banner follows the shared circuit breaker
+    LIVE_POLL_MS = 1000  # how often queued realtime changes are drawn when LIVE_UPDATES is on
+    FAILED_WRITES_POLL_MS = 2000  # how often the write journal is checked for writes the server rejected
+    RECONNECT_MIN_MS = 5_000  # first retry after a failed connection; doubles up to RECONNECT_MAX_MS
+    RECONNECT_MAX_MS = 300_000
+    STREAM_REDRAW_SECONDS = 1.0  # while a sync streams pages in, redraw at most this often after the first
+
     def __init__(self, master):
         self.master = master
         master.title("Cash Reminder App")
@@ -31,15 +59,37 @@ class ReminderApp:
         self.refresh_button = None
         self.delete_button = None
         self.status_label = None
-
-        # Try to initialize Supabase; on failure continue in offline mode
-        try:
-            self.supabase = init_supabase()
-            self.online = True
-        except Exception as e:
-            logger.warning("Supabase init failed at startup: %s", e)
-            self.supabase = None
-            self.online = False
+        self.failed_writes_bar = None
+        self._failed_writes = 0
+        self.loading_bar = None
+
+        # Database work runs on a single background worker; results come back via after()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reminder-db")
+        self._pending_tasks = 0
+        self._refresh_token = 0
+        self._refresh_future = None
+
+        # Active tab state: rows cached from the mirror, and what the Treeview currently shows
+        self._dataset = []
+        self._dataset_loaded = False
+        self._rendered = {}
+        self._visible_limit = self.PAGE_SIZE
+
+        # Local mirror serves reads immediately and while offline; synced with Supabase on refresh
+        self.mirror = LocalMirror()
+        # Adds/deletes go through the write-behind queue so they never wait on (or get lost to) the network
+        self.writes = WriteQueue(self.mirror)
+        # Remembers what Check Due Now already announced today
+        self.ledger = NotificationLedger()
+
+        # Connection comes up in the background; until then the app works from the mirror
+        self.supabase = None
+        self.online = False
+        self.feed = None
+        self._backend_state = CLOSED
+        self._reconnect_ms = self.RECONNECT_MIN_MS
+        self.writes.start()
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.tabs = ttk.Notebook(master)
         self.tabs.pack(expand=True, fill=tk.BOTH)
@@ -47,9 +97,115 @@ class ReminderApp:
         self.setup_add_tab()
         self.setup_active_tab()
 
-        # If offline, set UI accordingly and show a persistent status label
-        if not self.online:
-            self.set_offline_mode()
+        self.run_in_background(init_supabase, on_done=self.on_connected, on_error=self.on_connect_failed)
+        self.master.after(self.BREAKER_POLL_MS, self._watch_backend)
+        self.master.after(self.FAILED_WRITES_POLL_MS, self._watch_failed_writes)
+
+    # -----------------------------
+    # Background database work
+    # -----------------------------
+    def run_in_background(self, fn, *args, on_done=None, on_error=None, on_progress=None):
+        """Run fn(*args) on the DB worker and deliver the result to on_done on the Tk thread.
+
+        on_progress, if given, is called on the Tk thread at every poll while fn is still running.
+        """
+        future = self.executor.submit(fn, *args)
+        self._set_busy(1)
+
+        def poll():
+            if not future.done():
+                if on_progress:
+                    on_progress()
+                self.master.after(self.POLL_MS, poll)
+                return
+            self._set_busy(-1)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    logger.error("Background task failed: %s", error)
+            elif on_done:
+                on_done(future.result())
+
+        self.master.after(self.POLL_MS, poll)
+        return future
+
+    def _set_busy(self, delta):
+        self._pending_tasks += delta
+        if not self.loading_bar:
+            return
+        if self._pending_tasks > 0:
+            if not self.loading_bar.winfo_ismapped():
+                self.loading_bar.pack(side=tk.RIGHT, padx=10)
+                self.loading_bar.start(15)
+        else:
+            self.loading_bar.stop()
+            self.loading_bar.pack_forget()
+
+    def on_connected(self, client):
+        self.supabase = client
+        self.online = True
+        self._reconnect_ms = self.RECONNECT_MIN_MS
+        self.writes.set_client(client)
+        self.clear_offline_status()
+        self.refresh_active()
+        if LIVE_UPDATES and self.feed is None:
+            self.run_in_background(self._start_feed, on_done=self._on_feed_started,
+                                   on_error=lambda e: logger.warning("Live updates unavailable: %s", e))
+
+    def _start_feed(self):
+        return ChangeFeed(
+            ReminderIndex(), SupabaseRealtimeSource(), loader=mirror_loader(self.mirror, self.supabase), mirror=self.mirror
+        ).start()
+
+    def _on_feed_started(self, feed):
+        self.feed = feed
+        feed.drain_changes()
+        self.master.after(self.LIVE_POLL_MS, self._poll_feed)
+
+    def _poll_feed(self):
+        """Redraw when the change feed has written other clients' changes into the mirror."""
+        if self.feed is None:
+            return
+        if self.feed.drain_changes():
+            self.reload_dataset()
+            self.render_active()
+        self.master.after(self.LIVE_POLL_MS, self._poll_feed)
+
+    def _watch_backend(self):
+        """Show the offline banner as soon as the breaker opens, and drop it once a call succeeds again."""
+        state = backend_breaker.state
+        if state != self._backend_state and state in (OPEN, CLOSED):
+            self._backend_state = state
+            if state == OPEN:
+                self.set_offline_mode()
+            elif self.online:
+                self.clear_offline_status()
+        self.master.after(self.BREAKER_POLL_MS, self._watch_backend)
+
+    def _watch_failed_writes(self):
+        """Show a banner while the write journal holds writes the server rejected."""
+        count = self.writes.failed_count()
+        if count != self._failed_writes:
+            self._failed_writes = count
+            self.show_failed_writes(count)
+        self.master.after(self.FAILED_WRITES_POLL_MS, self._watch_failed_writes)
+
+    def on_connect_failed(self, error):
+        delay = self._reconnect_ms
+        self._reconnect_ms = min(self.RECONNECT_MAX_MS, delay * 2)
+        logger.warning("Supabase connection failed (%s); retrying in %d s", error, delay // 1000)
+        self.set_offline_mode()
+        self.master.after(delay, self._reconnect)
+
+    def _reconnect(self):
+        """Try the connection again; on success queued writes flush and the mirror syncs."""
+        if self.online:
+            return
+        self.run_in_background(init_supabase, on_done=self.on_connected, on_error=self.on_connect_failed)
 
     # -----------------------------
     # Add Reminder Tab
@@ -90,7 +246,7 @@ class ReminderApp:
         self.check_button = ttk.Button(
             frame,
             text="Check Due Now",
-            command=lambda: show_due_popups(self.supabase) if self.online else messagebox.showwarning("Offline", "No database connection")
+            command=self.check_due_now
         )
         self.check_button.pack(pady=5)
 
@@ -110,9 +266,10 @@ class ReminderApp:
         group_values = ["All"] + GROUP_NAMES
         self.active_group_dropdown = ttk.Combobox(control_frame, values=group_values, textvariable=self.active_group_var, state="readonly", width=20)
         self.active_group_dropdown.pack(side=tk.LEFT)
+        self.active_group_dropdown.bind("<<ComboboxSelected>>", self.on_filter_changed)
 
         self.include_one_time_var = tk.BooleanVar(value=True)
-        self.include_one_time_cb = ttk.Checkbutton(control_frame, text="Include one-time", variable=self.include_one_time_var)
+        self.include_one_time_cb = ttk.Checkbutton(control_frame, text="Include one-time", variable=self.include_one_time_var, command=self.on_filter_changed)
         self.include_one_time_cb.pack(side=tk.LEFT, padx=10)
 
         self.refresh_button = ttk.Button(control_frame, text="Refresh", command=self.refresh_active)
@@ -121,6 +278,15 @@ class ReminderApp:
         self.delete_button = ttk.Button(control_frame, text="Delete Selected", command=self.delete_selected)
         self.delete_button.pack(side=tk.RIGHT)
 
+        self.loading_bar = ttk.Progressbar(control_frame, mode="indeterminate", length=80)
+
+        # Paging footer: only PAGE_SIZE rows are drawn until the user asks for more
+        page_frame = ttk.Frame(frame)
+        page_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 8))
+        self.page_label = ttk.Label(page_frame, text="")
+        self.page_label.pack(side=tk.LEFT)
+        self.more_button = ttk.Button(page_frame, text="Show more", command=self.show_more)
+
         # Treeview listing reminders (columns adjusted)
         self.tree = ttk.Treeview(frame, columns=("name", "amount", "frequency", "day", "group"), show="headings")
         self.tree.heading("name", text="Name")
@@ -130,52 +296,67 @@ class ReminderApp:
         self.tree.heading("group", text="Group")
         self.tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
 
-        self.refresh_active()
+        self.refresh_active(sync=False)
 
     # -----------------------------
     # Helpers for offline mode
     # -----------------------------
     def set_offline_mode(self):
-        """Adjust UI when database is not available: disable DB actions and show a status label."""
-        if self.add_button:
-            try:
-                self.add_button.state(["disabled"])
-            except Exception:
-                self.add_button.config(state=tk.DISABLED)
-        if self.check_button:
-            try:
-                self.check_button.state(["disabled"])
-            except Exception:
-                self.check_button.config(state=tk.DISABLED)
-        if self.refresh_button:
-            try:
-                self.refresh_button.state(["disabled"])
-            except Exception:
-                self.refresh_button.config(state=tk.DISABLED)
-        if self.delete_button:
-            try:
-                self.delete_button.state(["disabled"])
-            except Exception:
-                self.delete_button.config(state=tk.DISABLED)
+        """Show a status label when the database is not available.
 
+        Actions stay enabled: reads come from the local mirror and writes are queued until reconnect.
+        """
         # Add a persistent status label at the bottom of the main window
         if not self.status_label:
-            self.status_label = ttk.Label(self.master, text="Offline: No database connection", foreground="red")
+            self.status_label = ttk.Label(self.master, text="Offline: changes will sync when the connection returns", foreground="red")
             self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
 
+    def show_failed_writes(self, count):
+        """Banner listing writes the server rejected, with Retry / Discard."""
+        if self.failed_writes_bar:
+            self.failed_writes_bar.destroy()
+            self.failed_writes_bar = None
+        if not count:
+            return
+        failed = self.writes.failed()
+        self.failed_writes_bar = bar = ttk.Frame(self.master)
+        bar.pack(side=tk.BOTTOM, fill=tk.X)
+        ttk.Label(bar, text=f"{count} change(s) rejected by the server: {failed[0][4] if failed else ''}",
+                  foreground="red").pack(side=tk.LEFT, padx=10)
+        ttk.Button(bar, text="Discard", command=self.discard_failed_writes).pack(side=tk.RIGHT, padx=(0, 10))
+        ttk.Button(bar, text="Retry", command=self.retry_failed_writes).pack(side=tk.RIGHT, padx=5)
+
+    def retry_failed_writes(self):
+        self.writes.retry_failed()
+        self._failed_writes = 0
+        self.show_failed_writes(0)
+
+    def discard_failed_writes(self):
+        if not messagebox.askyesno("Discard changes", "Drop the rejected changes and reload from the server?"):
+            return
+        self.writes.discard_failed()
+        self._failed_writes = 0
+        self.show_failed_writes(0)
+        self.refresh_active()
+
     def clear_offline_status(self):
         if self.status_label:
             self.status_label.destroy()
             self.status_label = None
 
+    def on_close(self):
+        # Pending writes are journalled on disk, so don't hold the window open for a final flush
+        self.writes.stop(flush=False)
+        if self.feed is not None:
+            self.feed.stop()
+            self.feed = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
+
     # -----------------------------
     # Add reminder action
     # -----------------------------
     def add_reminder(self):
-        if not self.online or not self.supabase:
-            messagebox.showerror("Offline", "Cannot add reminders while offline.")
-            return
-
         name = self.name_entry.get().strip()
         if not name:
             messagebox.showerror("Error", "Name required.")
@@ -202,86 +383,165 @@ class ReminderApp:
             except Exception:
                 messagebox.showerror("Error", "Invalid date format.")
                 return
-            success = add_one_time_reminder(self.supabase, name, amount, dt, group)
+            success = self.writes.add_one_time_reminder(name, amount, dt, group)
         else:
-            success = add_recurring_payment(self.supabase, name, amount, freq, day, group)
+            success = self.writes.add_recurring_payment(name, amount, freq, day, group)
 
         if success:
             messagebox.showinfo("Success", "Reminder added!")
-            self.refresh_active()
+            self.refresh_active(sync=False)
         else:
             messagebox.showerror("Error", "Failed to add reminder.")
 
     # -----------------------------
     # Active reminders actions
     # -----------------------------
-    def refresh_active(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+    def check_due_now(self):
+        def show(_result=None):
+            snapshot = DueSnapshot.from_mirror(self.mirror)
+            if not snapshot:
+                messagebox.showinfo("Check Due Now", "No reminders due today.")
+                return
+            # Always open the digest; the ledger only keeps the notification from repeating
+            show_due_popups(
+                self.supabase, snapshot, writes=self.writes, master=self.master,
+                on_marked=lambda: self.refresh_active(sync=False), ledger=self.ledger, requested=True
+            )
+
+        if self.online:
+            self.run_in_background(self.mirror.sync, self.supabase, on_done=show, on_error=show)
+        else:
+            show()
 
-        if not self.online or not self.supabase:
-            # Show a single placeholder row to indicate offline
-            self.tree.insert("", tk.END, values=("(offline)", "", "", "", ""))
+    def _sync_mirror(self, on_page=None):
+        self.writes.flush()
+        return self.mirror.sync(self.supabase, on_page)
+
+    def refresh_active(self, sync=True):
+        """Redraw from the mirror now; with sync, pull server changes in the background and redraw again."""
+        self.reload_dataset()
+        self.render_active()
+        if not (sync and self.online and self.supabase):
             return
 
-        group = self.active_group_var.get()
-        group_name = None if group == "All" else group
-
-        # recurring reminders
-        recurring = get_active_reminders(self.supabase, group_name=group_name) or []
-        for r in recurring:
-            self.tree.insert("", tk.END, values=(
-                r.get("name"),
-                r.get("amount", 0),
-                r.get("frequency"),
-                r.get("day_of_month") or "",
-                r.get("group_name") or ""
-            ))
-
-        # one-time reminders (if enabled)
-        if self.include_one_time_var.get():
-            one_time = get_active_one_time(self.supabase, group_name=group_name) or []
-            for r in one_time:
-                self.tree.insert("", tk.END, values=(
-                    r.get("name"),
-                    r.get("amount", 0),
-                    "one-time",
-                    "",
-                    r.get("group_name") or ""
-                ))
+        # A newer refresh supersedes any that is still queued or in flight
+        if self._refresh_future is not None:
+            self._refresh_future.cancel()
+        self._refresh_token += 1
+        token = self._refresh_token
+
+        # The worker sets `arrived` per stored page; the Tk thread redraws the first page at once
+        # and later ones at most every STREAM_REDRAW_SECONDS so a cold sync isn't a blank list
+        arrived = threading.Event()
+        next_draw = [0.0]
+
+        def progress():
+            if arrived.is_set() and token == self._refresh_token and time.monotonic() >= next_draw[0]:
+                arrived.clear()
+                next_draw[0] = time.monotonic() + self.STREAM_REDRAW_SECONDS
+                self.reload_dataset()
+                self.render_active()
+
+        def done(_result):
+            if token == self._refresh_token:
+                self.reload_dataset()
+                self.render_active()
+
+        self._refresh_future = self.run_in_background(
+            self._sync_mirror, lambda _table, _rows: arrived.set(), on_done=done, on_progress=progress
+        )
 
-    def delete_selected(self):
-        if not self.online or not self.supabase:
-            messagebox.showerror("Offline", "Cannot delete reminders while offline.")
-            return
+    def reload_dataset(self):
+        """Rebuild the cached active rows from the mirror; filters are applied later in render_active."""
+        rows = []
+        reminders = Reminder.from_rows(self.mirror.get_active_reminders(), Kind.RECURRING) + \
+            Reminder.from_rows(self.mirror.get_active_one_time(), Kind.ONE_TIME)
+        for r in reminders:
+            one_time = r.kind is Kind.ONE_TIME
+            rows.append((tree_iid(r.table, r.id), r.group_name, one_time, (
+                r.name,
+                r.amount,
+                Kind.ONE_TIME.value if one_time else r.frequency_key or "",
+                r.day_of_month or "",
+                r.group_name
+            )))
+        self._dataset = rows
+        self._dataset_loaded = self.mirror.has_data()
+
+    def on_filter_changed(self, _event=None):
+        self._visible_limit = self.PAGE_SIZE
+        self.render_active()
+
+    def show_more(self):
+        self._visible_limit += self.PAGE_SIZE
+        self.render_active()
+
+    def render_active(self):
+        """Filter the cached rows and patch the Treeview with only the rows that changed."""
+        if not self._dataset_loaded:
+            # Nothing cached yet: show a single placeholder row while connecting or offline
+            desired = []
+            if not self.online:
+                placeholder = "(loading...)" if self._pending_tasks else "(offline)"
+                desired.append(("placeholder", (placeholder, "", "", "", "")))
+            matching = desired
+        else:
+            group = self.active_group_var.get()
+            group_name = None if group == "All" else group
+            include_one_time = self.include_one_time_var.get()
+            matching = [
+                (iid, values) for iid, row_group, one_time, values in self._dataset
+                if (group_name is None or row_group == group_name) and (include_one_time or not one_time)
+            ]
+            desired = matching[:self._visible_limit]
+
+        self._apply_rows(desired)
+
+        if len(matching) > len(desired):
+            self.page_label.config(text=f"Showing {len(desired)} of {len(matching)}")
+            self.more_button.pack(side=tk.RIGHT)
+        else:
+            self.page_label.config(text="")
+            self.more_button.pack_forget()
+
+    def _apply_rows(self, desired):
+        """Insert, update or remove Treeview items so they match `desired` [(iid, values)], in order."""
+        wanted = dict(desired)
+        for iid in [i for i in self._rendered if i not in wanted]:
+            self.tree.delete(iid)
+            del self._rendered[iid]
+
+        for index, (iid, values) in enumerate(desired):
+            current = self._rendered.get(iid)
+            if current is None:
+                self.tree.insert("", index, iid=iid, values=values)
+            elif current != values:
+                self.tree.item(iid, values=values)
+            self._rendered[iid] = values
+
+        order = [iid for iid, _ in desired]
+        if list(self.tree.get_children()) != order:
+            for index, iid in enumerate(order):
+                self.tree.move(iid, "", index)
 
+    def delete_selected(self):
         selected = self.tree.selection()
         if not selected:
             return
         confirm = messagebox.askyesno("Confirm", "Delete selected reminder(s)?")
         if not confirm:
             return
+        by_table = {RECURRING_TABLE: [], ONE_TIME_TABLE: []}
         for item_id in selected:
-            values = self.tree.item(item_id)["values"]
-            name = values[0]
-            reminder_id = self.get_reminder_id_by_name(name)
-            if reminder_id:
-                delete_reminder(self.supabase, reminder_id)
-        self.refresh_active()
-
-    def get_reminder_id_by_name(self, name):
-        if not self.online or not self.supabase:
-            return None
-        reminders = get_active_reminders(self.supabase)
-        for r in reminders:
-            if r.get("name") == name:
-                return r.get("id")
-        # check one-time as well
-        one_time = get_active_one_time(self.supabase)
-        for r in one_time:
-            if r.get("name") == name:
-                return r.get("id")
-        return None
+            key = parse_tree_iid(item_id)
+            if key:
+                by_table[key[0]].append(key[1])
+        # One queued delete per table; the write queue flushes each as a single in_() request
+        if by_table[RECURRING_TABLE]:
+            self.writes.delete_reminders(by_table[RECURRING_TABLE])
+        if by_table[ONE_TIME_TABLE]:
+            self.writes.delete_reminders(by_table[ONE_TIME_TABLE], one_time=True)
+        self.refresh_active(sync=False)
 
 
 if __name__ == "__main__":
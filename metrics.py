@@ -0,0 +1,201 @@
+# metrics.py
+"""
+In-process call metrics for the database and due-check hot paths.
+
+Functions decorated with @instrumented record wall time into a latency
+histogram, plus rows returned, HTTP round trips and response bytes. Round
+trips and bytes come from a response hook on the shared HTTP client
+(reminder_core._shared_http_client) and are charged to every instrumented
+call active on the thread, so an outer call includes its inner ones.
+A call counts as an error when it raises, returns False, or calls
+record_failure() from a handler that logs and returns a fallback ([] / {} /
+None); like round trips, that error is charged to the enclosing calls too.
+Calls slower than SLOW_CALL_MS are logged. snapshot() / to_json() /
+to_prometheus() export the current numbers.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import functools
+
+logger = logging.getLogger("metrics")
+
+# Latency histogram upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOW_CALL_MS = float(os.getenv("REMINDER_SLOW_CALL_MS", "1000"))
+
+_lock = threading.Lock()
+_stats = {}
+_local = threading.local()
+
+
+class CallStats:
+    __slots__ = ("count", "errors", "total", "max", "buckets", "rows", "round_trips", "bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.rows = 0
+        self.round_trips = 0
+        self.bytes = 0
+
+    def observe(self, seconds, rows, round_trips, nbytes, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.rows += rows or 0
+        self.round_trips += round_trips
+        self.bytes += nbytes
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": round(self.total, 6),
+            "max_seconds": round(self.max, 6),
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.buckets)),
+            "rows": self.rows,
+            "round_trips": self.round_trips,
+            "bytes": self.bytes,
+        }
+
+
+def _active_frames():
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def record_round_trip(nbytes=0):
+    """Charge one backend request of `nbytes` response bytes to the calls running on this thread."""
+    for frame in _active_frames():
+        frame[0] += 1
+        frame[1] += nbytes
+
+
+def record_failure():
+    """Mark the instrumented calls running on this thread as failed, for errors caught and logged."""
+    for frame in _active_frames():
+        frame[2] = True
+
+
+def on_http_response(response):
+    """httpx response event hook feeding record_round_trip."""
+    response.read()
+    record_round_trip(len(response.content))
+
+
+def _row_count(result):
+    if result is None or isinstance(result, (bool, str, bytes)):
+        return None
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def instrumented(func=None, *, name=None):
+    """Decorator recording timing, rows, round trips and bytes under `name` (default: qualname)."""
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    label = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        frames = _active_frames()
+        frame = [0, 0, False]  # round trips, bytes, failure recorded
+        frames.append(frame)
+        failed = True
+        result = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            # The data functions log and return False (or call record_failure) instead of raising
+            failed = result is False or frame[2]
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            frames.pop()
+            rows = _row_count(result)
+            with _lock:
+                stats = _stats.get(label)
+                if stats is None:
+                    stats = _stats[label] = CallStats()
+                stats.observe(elapsed, rows, frame[0], frame[1], failed)
+            if elapsed * 1000 >= SLOW_CALL_MS:
+                logger.warning("Slow call %s: %.0f ms, rows=%s, round_trips=%d, bytes=%d",
+                               label, elapsed * 1000, rows, frame[0], frame[1])
+
+    return wrapper
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def snapshot():
+    """Current metrics as {name: {...}}."""
+    with _lock:
+        return {label: stats.as_dict() for label, stats in sorted(_stats.items())}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def to_json(indent=2):
+    return json.dumps(snapshot(), indent=indent, ensure_ascii=False)
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(prefix="reminder_call"):
+    """Prometheus text exposition format (histogram plus per-call counters)."""
+    with _lock:
+        items = sorted(_stats.items())
+        lines = [
+            f"# HELP {prefix}_duration_seconds Wall time of instrumented calls.",
+            f"# TYPE {prefix}_duration_seconds histogram",
+        ]
+        for label, stats in items:
+            fn = _label(label)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, stats.buckets):
+                cumulative += n
+                lines.append(f'{prefix}_duration_seconds_bucket{{fn="{fn}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_duration_seconds_bucket{{fn="{fn}",le="+Inf"}} {stats.count}')
+            lines.append(f'{prefix}_duration_seconds_sum{{fn="{fn}"}} {stats.total:.6f}')
+            lines.append(f'{prefix}_duration_seconds_count{{fn="{fn}"}} {stats.count}')
+        for field, help_text in (
+            ("errors", "Calls that raised or returned False."),
+            ("rows", "Rows returned."),
+            ("round_trips", "Backend HTTP requests made."),
+            ("bytes", "Backend response bytes received."),
+        ):
+            lines.append(f"# HELP {prefix}_{field}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{field}_total counter")
+            for label, stats in items:
+                lines.append(f'{prefix}_{field}_total{{fn="{_label(label)}"}} {getattr(stats, field)}')
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(path):
+    """Write metrics to `path`: JSON for *.json, Prometheus text otherwise."""
+    text = to_json() if path.lower().endswith(".json") else to_prometheus()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,261 @@
+# models.py
+"""
+Typed reminder rows.
+
+Reminder is a __slots__ object built once from a PostgREST row. It has
+pre-parsed dates, a Frequency enum (plus interval_days for "every N days"
+rows) and an explicit Kind, so consumers stop re-parsing last_recorded_date,
+re-normalising frequency, and guessing one-time from the presence of
+reminder_date. Reminder.get(column) answers like the row dict did, so code
+written against dicts keeps working.
+
+ReminderColumns holds one table as parallel lists for bulk paths
+(due masks, totals over 100k rows) where even a slotted object per row
+costs more than needed.
+"""
+from enum import Enum
+from datetime import date
+from reminder_core import (
+    FREQUENCY_DAYS,
+    parse_iso_date,
+    next_due_date,
+    recurring_due_mask_columns,
+    _due_window
+)
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+
+
+class Frequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    YEARLY = "yearly"
+    CUSTOM = "custom"  # every interval_days days, stored as a digit string
+
+    @classmethod
+    def parse(cls, raw):
+        """(Frequency, interval_days) for a stored frequency; (None, None) if blank or unknown."""
+        value = (raw or "").strip().lower()
+        if value in FREQUENCY_DAYS:
+            return cls(value), FREQUENCY_DAYS[value]
+        if value.isdigit():
+            return cls.CUSTOM, int(value)
+        return None, None
+
+
+class Kind(str, Enum):
+    RECURRING = "recurring"
+    ONE_TIME = "one-time"
+
+    @property
+    def table(self):
+        return ONE_TIME_TABLE if self is Kind.ONE_TIME else RECURRING_TABLE
+
+    @classmethod
+    def for_table(cls, table):
+        return cls.ONE_TIME if table == ONE_TIME_TABLE else cls.RECURRING
+
+
+def _amount(value):
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Reminder:
+    __slots__ = ("id", "kind", "name", "amount", "group_name", "frequency", "interval_days",
+                 "day_of_month", "last_recorded_date", "reminder_date", "is_active", "is_completed")
+
+    def __init__(self, id, kind, name="", amount=0, group_name="", frequency=None, interval_days=None,
+                 day_of_month=None, last_recorded_date=None, reminder_date=None,
+                 is_active=True, is_completed=False):
+        self.id = id
+        self.kind = kind
+        self.name = name
+        self.amount = amount
+        self.group_name = group_name
+        self.frequency = frequency
+        self.interval_days = interval_days
+        self.day_of_month = day_of_month
+        self.last_recorded_date = last_recorded_date
+        self.reminder_date = reminder_date
+        self.is_active = is_active
+        self.is_completed = is_completed
+
+    @classmethod
+    def from_row(cls, row, kind):
+        """Build from a row dict of `kind`'s table; unknown columns are dropped."""
+        if kind is Kind.ONE_TIME:
+            return cls(
+                str(row.get("id")), kind, row.get("name") or "", _amount(row.get("amount")),
+                row.get("group_name") or "",
+                reminder_date=parse_iso_date(row.get("reminder_date")),
+                is_completed=bool(row.get("is_completed"))
+            )
+        frequency, interval_days = Frequency.parse(row.get("frequency"))
+        return cls(
+            str(row.get("id")), kind, row.get("name") or "", _amount(row.get("amount")),
+            row.get("group_name") or "", frequency, interval_days, row.get("day_of_month"),
+            last_recorded_date=parse_iso_date(row.get("last_recorded_date")),
+            is_active=row.get("is_active") is not False
+        )
+
+    @classmethod
+    def from_rows(cls, rows, kind):
+        return [row if isinstance(row, cls) else cls.from_row(row, kind) for row in rows]
+
+    @property
+    def table(self):
+        return self.kind.table
+
+    @property
+    def frequency_key(self):
+        """Frequency as the due rules spell it: "monthly", "14", or "" when unknown."""
+        if self.frequency is Frequency.CUSTOM:
+            return str(self.interval_days)
+        return self.frequency.value if self.frequency else ""
+
+    def get(self, column, default=None):
+        """Row-dict style lookup; dates come back as date objects, frequency as frequency_key."""
+        if column == "frequency":
+            value = self.frequency_key if self.kind is Kind.RECURRING else None
+        elif column in Reminder.__slots__:
+            value = getattr(self, column)
+        else:
+            value = None
+        return default if value is None else value
+
+    def to_row(self):
+        """Row dict for this reminder's table, dates as ISO strings."""
+        row = {"id": self.id, "name": self.name, "amount": self.amount, "group_name": self.group_name}
+        if self.kind is Kind.ONE_TIME:
+            row["reminder_date"] = self.reminder_date.isoformat() if self.reminder_date else None
+            row["is_completed"] = self.is_completed
+            return row
+        row["frequency"] = self.frequency_key or None
+        row["day_of_month"] = self.day_of_month
+        row["last_recorded_date"] = self.last_recorded_date.isoformat() if self.last_recorded_date else None
+        row["is_active"] = self.is_active
+        return row
+
+    def is_due(self, today=None):
+        """is_recurring_due / the one-time due rule, without re-parsing anything."""
+        if today is None:
+            today = date.today()
+        if self.kind is Kind.ONE_TIME:
+            return not self.is_completed and self.reminder_date is not None and self.reminder_date <= today
+        if not self.is_active:
+            return False
+        window = _due_window(self.frequency_key, today)
+        if window is None:
+            return False
+        if self.last_recorded_date is None:
+            return True
+        ordinal = self.last_recorded_date.toordinal()
+        return ordinal < window[0] or ordinal >= window[1]
+
+    def next_due(self, today=None):
+        """Date the reminder falls due: next_due_date for recurring, reminder_date for one-time."""
+        if self.kind is Kind.ONE_TIME:
+            return None if self.is_completed else self.reminder_date
+        return next_due_date(self, today)
+
+    def __eq__(self, other):
+        if not isinstance(other, Reminder):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in Reminder.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Reminder({self.kind.value} {self.id!r} {self.name!r})"
+
+
+def reminders_due_mask(items, today=None):
+    """Reminder.is_due over many recurring items, one due window per distinct frequency."""
+    return recurring_due_mask_columns(
+        [item.frequency_key for item in items],
+        [item.last_recorded_date for item in items],
+        today,
+        [item.is_active for item in items]
+    )
+
+
+class ReminderColumns:
+    """One table's reminders as parallel lists, for bulk evaluation.
+
+    Dates are kept as day ordinals (None when missing) and frequencies as their
+    normalised keys, which is what recurring_due_mask_columns works on.
+    """
+
+    __slots__ = ("kind", "ids", "names", "amounts", "groups", "frequencies", "day_of_month",
+                 "last_ordinals", "reminder_ordinals", "active", "completed")
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.ids, self.names, self.amounts, self.groups = [], [], [], []
+        self.frequencies, self.day_of_month, self.last_ordinals = [], [], []
+        self.reminder_ordinals, self.active, self.completed = [], [], []
+
+    @classmethod
+    def from_rows(cls, rows, kind):
+        cols = cls(kind)
+        for row in rows:
+            cols.append(row)
+        return cols
+
+    def append(self, row):
+        item = row if isinstance(row, Reminder) else Reminder.from_row(row, self.kind)
+        self.ids.append(item.id)
+        self.names.append(item.name)
+        self.amounts.append(item.amount)
+        self.groups.append(item.group_name)
+        self.frequencies.append(item.frequency_key)
+        self.day_of_month.append(item.day_of_month)
+        self.last_ordinals.append(item.last_recorded_date.toordinal() if item.last_recorded_date else None)
+        self.reminder_ordinals.append(item.reminder_date.toordinal() if item.reminder_date else None)
+        self.active.append(item.is_active)
+        self.completed.append(item.is_completed)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        frequency, interval_days = Frequency.parse(self.frequencies[i])
+        last, when = self.last_ordinals[i], self.reminder_ordinals[i]
+        return Reminder(
+            self.ids[i], self.kind, self.names[i], self.amounts[i], self.groups[i], frequency, interval_days,
+            self.day_of_month[i],
+            date.fromordinal(last) if last is not None else None,
+            date.fromordinal(when) if when is not None else None,
+            self.active[i], self.completed[i]
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def due_mask(self, today=None):
+        """One bool per row, same answers as Reminder.is_due."""
+        if today is None:
+            today = date.today()
+        if self.kind is Kind.ONE_TIME:
+            today_ord = today.toordinal()
+            return [o is not None and o <= today_ord and not c
+                    for o, c in zip(self.reminder_ordinals, self.completed)]
+        return recurring_due_mask_columns(self.frequencies, self.last_ordinals, today, self.active)
+
+    def due(self, today=None):
+        return [self[i] for i, due in enumerate(self.due_mask(today)) if due]
+
+    def totals_by_group(self, mask=None):
+        """Sum of amounts per group, optionally only where mask is True."""
+        totals = {}
+        rows = zip(self.groups, self.amounts) if mask is None else \
+            ((g, a) for g, a, m in zip(self.groups, self.amounts, mask) if m)
+        for group, amount in rows:
+            totals[group] = totals.get(group, 0) + amount
+        return totals
@@ -0,0 +1,155 @@
+# multi_check.py
+"""
+Due checks for several Supabase projects ("profiles") from one process.
+
+Each profile has a name, url, key (or key_env naming the environment
+variable that holds it) and an optional list of groups to check. All
+profiles' recurring and one-time queries run concurrently on one asyncio
+event loop. At most `concurrency` requests are in flight at once. Each
+profile has its own circuit breaker, so one unreachable project fails fast
+without holding up the others. The due rules are reminder_core's:
+due_query on the server, then recurring_due_mask.
+
+    python reminder_script.py --check --profiles profiles.json [--concurrency 8]
+
+profiles.json:
+    [{"name": "home", "url": "https://x.supabase.co", "key_env": "HOME_SUPABASE_KEY", "groups": ["БАНКЯ"]}]
+
+Exit code: 2 if any profile could not be checked, else 1 if anything is due, else 0.
+"""
+import os
+import json
+import asyncio
+import logging
+from datetime import date
+from reminder_core import (
+    SUPABASE_TIMEOUT,
+    SUPABASE_CONNECT_TIMEOUT,
+    due_query,
+    recurring_due_mask
+)
+from resilience import CircuitBreaker, run_request_async
+
+logger = logging.getLogger("multi_check")
+
+DEFAULT_CONCURRENCY = 8
+
+
+class Profile:
+    def __init__(self, name, url, key, groups=None):
+        self.name = name
+        self.url = url
+        self.key = key
+        self.groups = list(groups) if groups else None
+
+    @classmethod
+    def from_dict(cls, data):
+        key = data.get("key") or os.getenv(data.get("key_env", ""), "")
+        if not data.get("url") or not key:
+            raise ValueError(f"Profile {data.get('name')!r} needs url and key (or key_env)")
+        return cls(data.get("name") or data["url"], data["url"], key, data.get("groups"))
+
+
+class ProfileResult:
+    def __init__(self, profile, recurring=None, one_time=None, error=None):
+        self.profile = profile
+        self.recurring = recurring or []
+        self.one_time = one_time or []
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __len__(self):
+        return len(self.recurring) + len(self.one_time)
+
+
+def load_profiles(path):
+    with open(path, encoding="utf-8") as f:
+        return [Profile.from_dict(p) for p in json.load(f)]
+
+
+def make_async_client(profile, http_client=None):
+    """AsyncPostgrestClient for one profile (same query builder API, awaited execute())."""
+    from postgrest import AsyncPostgrestClient
+    return AsyncPostgrestClient(
+        f"{profile.url.rstrip('/')}/rest/v1",
+        headers={
+            "apikey": profile.key,
+            "Authorization": f"Bearer {profile.key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        },
+        http_client=http_client
+    )
+
+
+async def _query(limit, breaker, query):
+    async with limit:
+        return (await run_request_async(query, idempotent=True, breaker=breaker)).data or []
+
+
+async def check_profile(profile, client, today, limit, breaker=None):
+    """Recurring and one-time queries for one profile, run concurrently."""
+    breaker = breaker or CircuitBreaker()
+    recurring_query = due_query(client, "recurring_payments", today)
+    one_time_query = due_query(client, "one_time_reminders", today)
+    if profile.groups:
+        recurring_query = recurring_query.in_("group_name", profile.groups)
+        one_time_query = one_time_query.in_("group_name", profile.groups)
+    try:
+        rows, one_time = await asyncio.gather(
+            _query(limit, breaker, recurring_query),
+            _query(limit, breaker, one_time_query)
+        )
+    except Exception as e:
+        logger.error("Profile %s check failed: %s", profile.name, e)
+        return ProfileResult(profile, error=e)
+    recurring = [item for item, due in zip(rows, recurring_due_mask(rows, today)) if due]
+    return ProfileResult(profile, recurring, one_time)
+
+
+async def check_profiles_async(profiles, today=None, concurrency=DEFAULT_CONCURRENCY, client_factory=None):
+    """Check every profile on the running loop; returns ProfileResults in profile order."""
+    if today is None:
+        today = date.today()
+    limit = asyncio.Semaphore(concurrency)
+    http_client = None
+    if client_factory is None:
+        import httpx
+        # One pool for all profiles; the semaphore, not the pool, bounds concurrency
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+        def client_factory(profile):
+            return make_async_client(profile, http_client)
+    try:
+        clients = [client_factory(p) for p in profiles]
+        return await asyncio.gather(*(
+            check_profile(p, c, today, limit) for p, c in zip(profiles, clients)
+        ))
+    finally:
+        if http_client is not None:
+            await http_client.aclose()
+
+
+def check_profiles(profiles, today=None, concurrency=DEFAULT_CONCURRENCY, client_factory=None):
+    return asyncio.run(check_profiles_async(profiles, today, concurrency, client_factory))
+
+
+def exit_code(results):
+    if any(not r.ok for r in results):
+        return 2
+    return 1 if any(len(r) for r in results) else 0
+
+
+def log_results(results):
+    for r in results:
+        if r.ok:
+            logger.info("[%s] %d due (recurring=%d, one_time=%d)",
+                        r.profile.name, len(r), len(r.recurring), len(r.one_time))
+        else:
+            logger.error("[%s] not checked: %s", r.profile.name, r.error)
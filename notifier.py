@@ -3,14 +3,19 @@ import os
 import webbrowser
 import locale
 import tkinter as tk
-from tkinter import messagebox, Toplevel, Label, Button
+from tkinter import ttk, Toplevel, Label, Button
 from datetime import date
 from plyer import notification
 from config import APP_NAME, ICON_PATH, SPREADSHEET_URL, setup_logging
+from metrics import instrumented
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+from models import Reminder, Kind
+from ledger import change_token, CHECK_ONLY, NOTIFY
 from reminder_core import (
-    record_payment,
-    mark_one_time_completed,
-    get_due_reminders,
+    record_payments,
+    mark_one_time_reminders_completed,
+    get_due_recurring_reminders,
+    get_due_one_time_reminders,
     delete_reminder
 )
 
@@ -39,89 +44,259 @@ def send_native_notification(title, message):
 
 
 class ReminderPopup:
-    AUTO_CLOSE_MS = 60_000  # 1 minute
+    """One digest window listing every due reminder, with multi-select Mark Done."""
+    AUTO_CLOSE_MS = 60_000  # 1 minute without interaction
 
-    def __init__(self, master, item, supabase, one_time=False):
+    def __init__(self, master, snapshot, supabase, writes=None, on_marked=None, ledger=None):
         self.master = master
-        self.item = item
         self.supabase = supabase
-        self.one_time = one_time
+        self.writes = writes
+        self.on_marked = on_marked
+        self.ledger = ledger
+        self.today = snapshot.today
+        self._items = {}
+        self._close_job = None
 
-        master.title("Reminder Due")
-        master.geometry("400x200")
-        master.resizable(False, False)
+        master.title(f"Reminders Due ({len(snapshot)})")
+        master.geometry("560x360")
         master.grab_set()
 
-        Label(master, text=f"Reminder: {item.get('name')}", font=("Arial", 14, "bold")).pack(pady=(10,5))
-        Label(master, text=f"Amount: {format_currency(item.get('amount', 0))}", font=("Arial", 12)).pack()
+        Label(master, text=f"{len(snapshot)} reminders due", font=("Arial", 14, "bold")).pack(pady=(10, 5))
+
+        list_frame = tk.Frame(master)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        columns = ("name", "amount", "group", "type")
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="extended")
+        for column, heading, width in zip(columns, ("Name", "Amount", "Group", "Type"), (200, 100, 130, 80)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill="both", expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+
+        for item in snapshot.all:
+            self._items[f"{item.table}:{item.id}"] = item
+            self.tree.insert("", "end", iid=f"{item.table}:{item.id}", values=(
+                item.name, format_currency(item.amount), item.group_name, item.kind.value
+            ))
+
+        self.status = Label(master, text="Select reminders and press Mark Done.")
+        self.status.pack(pady=(5, 0))
 
         btn_frame = tk.Frame(master)
-        btn_frame.pack(pady=20)
+        btn_frame.pack(pady=10)
         Button(btn_frame, text="Mark Done", bg="green", fg="white", command=self.mark_done).pack(side=tk.LEFT, padx=8)
+        Button(btn_frame, text="Select All", command=self.select_all).pack(side=tk.LEFT, padx=8)
         Button(btn_frame, text="Open Sheet", bg="blue", fg="white", command=self.open_sheet).pack(side=tk.LEFT, padx=8)
+        Button(btn_frame, text="Close", command=self.close).pack(side=tk.LEFT, padx=8)
+
+        master.bind("<Button>", self._restart_auto_close, add="+")
+        master.bind("<Key>", self._restart_auto_close, add="+")
+        self._restart_auto_close()
+
+    def _restart_auto_close(self, _event=None):
+        if not ReminderPopup.AUTO_CLOSE_MS:
+            return
+        if self._close_job is not None:
+            self.master.after_cancel(self._close_job)
+        self._close_job = self.master.after(ReminderPopup.AUTO_CLOSE_MS, self.master.destroy)
+
+    def close(self):
+        """Closed by the user: whatever is still listed has been seen and won't be announced again."""
+        if self.ledger is not None:
+            seen = [self._items[iid] for iid in self.tree.get_children() if iid in self._items]
+            try:
+                self.ledger.acknowledge(seen, self.today)
+            except Exception:
+                logger.exception("Could not record acknowledged reminders.")
+        self.master.destroy()
 
-        if ReminderPopup.AUTO_CLOSE_MS:
-            master.after(ReminderPopup.AUTO_CLOSE_MS, master.destroy)
+    def select_all(self):
+        self.tree.selection_set(self.tree.get_children())
+
+    def selected_ids(self):
+        """Selected rows split by table: {table: [id, ...]}."""
+        by_table = {}
+        for iid in self.tree.selection():
+            table, _, reminder_id = iid.partition(":")
+            by_table.setdefault(table, []).append(reminder_id)
+        return by_table
 
     def mark_done(self):
-        if self.one_time:
-            mark_one_time_completed(self.supabase, self.item.get("id"))
+        by_table = self.selected_ids()
+        if not by_table:
+            self.status.config(text="Nothing selected.")
+            return
+        recurring_ids = by_table.get(RECURRING_TABLE, [])
+        one_time_ids = by_table.get(ONE_TIME_TABLE, [])
+        if self.writes is not None:
+            self.writes.record_payments(recurring_ids)
+            self.writes.mark_one_time_reminders_completed(one_time_ids)
+            results = {RECURRING_TABLE: dict.fromkeys(recurring_ids, True),
+                       ONE_TIME_TABLE: dict.fromkeys(one_time_ids, True)}
         else:
-            record_payment(self.supabase, self.item.get("id"))
-        messagebox.showinfo("Marked", "Reminder marked done.")
-        self.master.destroy()
+            frequencies = {i: self._items[f"{RECURRING_TABLE}:{i}"].frequency_key for i in recurring_ids}
+            results = {RECURRING_TABLE: record_payments(self.supabase, recurring_ids, frequencies),
+                       ONE_TIME_TABLE: mark_one_time_reminders_completed(self.supabase, one_time_ids)}
+
+        done = failed = 0
+        for table, outcome in results.items():
+            for reminder_id, ok in outcome.items():
+                if ok:
+                    self.tree.delete(f"{table}:{reminder_id}")
+                    done += 1
+                else:
+                    failed += 1
+        self.status.config(text=f"Marked {done} done." + (f" {failed} failed; see log." if failed else ""))
+        if self.on_marked and done:
+            self.on_marked()
+        if not self.tree.get_children():
+            self.master.destroy()
 
     def open_sheet(self):
         webbrowser.open(SPREADSHEET_URL)
 
+
+class DueSnapshot:
+    """Reminders due on one day, fetched with a single query per table.
+
+    Built once per check and handed to the popup, cron and GUI paths so none of
+    them has to hit the database again to split recurring from one-time items.
+    Rows are turned into Reminder objects here, once.
+    """
+
+    def __init__(self, recurring, one_time, today):
+        self.recurring = Reminder.from_rows(recurring or [], Kind.RECURRING)
+        self.one_time = Reminder.from_rows(one_time or [], Kind.ONE_TIME)
+        self.today = today
+
+    @classmethod
+    @instrumented
+    def fetch(cls, supabase, today=None):
+        if today is None:
+            today = date.today()
+        return cls(
+            get_due_recurring_reminders(supabase, today),
+            get_due_one_time_reminders(supabase, today),
+            today
+        )
+
+    @classmethod
+    @instrumented
+    def from_mirror(cls, mirror, today=None):
+        """Build the snapshot from the local SQLite mirror without touching the network."""
+        if today is None:
+            today = date.today()
+        return cls(
+            mirror.get_due_recurring_reminders(today),
+            mirror.get_due_one_time_reminders(today),
+            today
+        )
+
+    @property
+    def all(self):
+        return self.recurring + self.one_time
+
+    def __len__(self):
+        return len(self.recurring) + len(self.one_time)
+
+    def __bool__(self):
+        return len(self) > 0
+
 def get_due_recurring(supabase, today=None):
     """Return only recurring reminders due today."""
-    all_due = get_due_reminders(supabase, today)
-    recurring = [d for d in (all_due or []) if not d.get("reminder_date")]
-    return recurring
+    return get_due_recurring_reminders(supabase, today)
 
 def get_due_one_time(supabase, today=None):
     """Return only one-time reminders due today."""
-    all_due = get_due_reminders(supabase, today)
-    one_time = [d for d in (all_due or []) if d.get("reminder_date")]
-    return one_time
+    return get_due_one_time_reminders(supabase, today)
+
+def notification_text(new, total):
+    """One coalesced (title, message) for `new` reminders out of `total` due."""
+    title = f"{len(new)} reminders due today" if len(new) == total else f"{len(new)} new reminders due ({total} open)"
+    names = ", ".join(str(item.name) for item in new[:3])
+    if len(new) > 3:
+        names += f" and {len(new) - 3} more"
+    return title, names
 
-def show_due_popups(supabase):
-    today = date.today()
-    due_recurring = get_due_recurring(supabase, today)
-    due_one_time = get_due_one_time(supabase, today)
-    all_due = (due_recurring or []) + (due_one_time or [])
+def show_due_popups(supabase, snapshot=None, writes=None, master=None, on_marked=None, ledger=None,
+                    requested=False):
+    """Notify and open one digest window for everything due. Returns how many reminders were announced.
 
-    if not all_due:
-        logger.info("No reminders due today.")
-        return
+    With `master` (a running app) the digest is a Toplevel of it; otherwise a Tk root
+    is created and its main loop runs until the digest is closed. With a ledger, only
+    reminders not yet announced today (and not acknowledged) trigger the notification
+    and the digest, and an unchanged change token skips the fetch altogether.
+    A `requested` check (the user asked for it) always opens the digest with
+    everything due, so acknowledged items can still be marked; the ledger then
+    only keeps the native notification from repeating.
+    """
+    token = None
+    if snapshot is None:
+        if ledger is not None and not requested:
+            token = change_token(supabase)
+            if ledger.unchanged(NOTIFY, token, date.today()):
+                logger.info("Nothing changed since the last announcement; skipping the check.")
+                return 0
+        snapshot = DueSnapshot.fetch(supabase)
+    all_due = snapshot.all
+    new = all_due if ledger is None else ledger.pending(all_due, snapshot.today)
+    if ledger is not None:
+        ledger.save_check(NOTIFY, token, snapshot.today, len(snapshot))
 
-    # Show native notification with summary
-    names = [d.get('name') for d in all_due[:3]]
-    send_native_notification(f"{len(all_due)} reminders due today", ", ".join(names))
+    if not new:
+        if all_due:
+            logger.info("No new reminders due (%d already announced).", len(all_due))
+        else:
+            logger.info("No reminders due today.")
+        if not (requested and all_due):
+            return 0
+    else:
+        send_native_notification(*notification_text(new, len(all_due)))
+        if ledger is not None:
+            ledger.record(new, snapshot.today)
 
-    # Tkinter popups
+    if master is not None:
+        ReminderPopup(Toplevel(master), snapshot, supabase, writes=writes, on_marked=on_marked, ledger=ledger)
+        return len(new)
     root = tk.Tk()
-    root.withdraw()
-    for item in due_recurring or []:
-        win = Toplevel(root)
-        ReminderPopup(win, item, supabase, one_time=False)
-    for item in due_one_time or []:
-        win = Toplevel(root)
-        ReminderPopup(win, item, supabase, one_time=True)
+    ReminderPopup(root, snapshot, supabase, writes=writes, on_marked=on_marked, ledger=ledger)
     root.mainloop()
+    return len(new)
+
+@instrumented
+def run_check_only(supabase, only_day_of_month_match=True, snapshot=None, ledger=None, mirror=None):
+    """Non-interactive check used by scripts/cron. Returns True if any due reminders found.
 
-def run_check_only(supabase, only_day_of_month_match=True):
-    """Non-interactive check used by scripts/cron. Returns True if any due reminders found."""
-    due_recurring = get_due_recurring(supabase)
-    due_one_time = get_due_one_time(supabase)
-    found = bool((due_recurring and len(due_recurring) > 0) or (due_one_time and len(due_one_time) > 0))
+    With a ledger and no snapshot, an unchanged change token since today's last
+    check answers from the ledger without fetching. With a mirror, the check syncs
+    it and reads from it instead of querying; None means it could neither sync
+    nor fall back to earlier data.
+    """
+    token = None
+    if snapshot is None:
+        if ledger is not None:
+            token = change_token(supabase)
+            if ledger.unchanged(CHECK_ONLY, token, date.today()):
+                count = ledger.last_due_count(CHECK_ONLY)
+                logger.info("No changes since the last check; %d reminders due.", count)
+                return count > 0
+        if mirror is None:
+            snapshot = DueSnapshot.fetch(supabase)
+        elif mirror.sync(supabase) is None and not mirror.has_data():
+            logger.error("Could not reach Supabase and no local mirror to check against.")
+            return None
+        else:
+            snapshot = DueSnapshot.from_mirror(mirror)
+    found = bool(snapshot)
     if found:
         logger.info("Found %d due reminders (recurring=%d, one_time=%d)",
-                    (len(due_recurring or [] ) + len(due_one_time or [])),
-                    len(due_recurring or []), len(due_one_time or []))
+                    len(snapshot), len(snapshot.recurring), len(snapshot.one_time))
+    if ledger is not None:
+        ledger.save_check(CHECK_ONLY, token, snapshot.today, len(snapshot))
     return found
 
-def run_interactive(supabase, only_day_of_month_match=True):
+def run_interactive(supabase, only_day_of_month_match=True, writes=None, ledger=None):
     """Interactive run - show popups to the user."""
-    show_due_popups(supabase)
\ No newline at end of file
+    show_due_popups(supabase, writes=writes, ledger=ledger)
\ No newline at end of file
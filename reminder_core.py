@@ -1,14 +1,25 @@
 # reminder_core.py
 import os
+import time
 import logging
-from datetime import date, datetime
+import threading
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from metrics import instrumented, record_failure, on_http_response
+from resilience import run_request
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Per-request deadline for the shared HTTP connection pool, in seconds
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "15"))
+# Connecting (DNS + TCP + TLS) gets a shorter budget so an unreachable host fails fast
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
 
 logger = logging.getLogger("reminder_core")
 
@@ -16,27 +27,76 @@ logger = logging.getLogger("reminder_core")
 # -----------------------------
 # INIT & CONNECTION
 # -----------------------------
-def init_supabase() -> Client:
-    """Initialize and return a Supabase client."""
+_clients = {}
+_clients_lock = threading.Lock()
+_http_client = None
+
+
+def _shared_http_client():
+    """One pooled keep-alive HTTP client for every Supabase client in the process."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(
+            timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            http2=True,
+            event_hooks={"response": [on_http_response]}
+        )
+    return _http_client
+
+
+def _create_client(rest_only):
+    # supabase/postgrest pull in pydantic, auth, storage and realtime; import them only when a
+    # client is actually needed so entry points and offline paths start fast.
+    if rest_only:
+        from postgrest import SyncPostgrestClient
+        return SyncPostgrestClient(
+            f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+            headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+            http_client=_shared_http_client()
+        )
+    from supabase import create_client, ClientOptions
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(httpx_client=_shared_http_client()))
+
+
+@instrumented
+def init_supabase(probe=True, rest_only=False) -> "Client":
+    """Return the process-wide Supabase client, creating it on first use.
+
+    probe=False skips the test query; the first real query surfaces connection errors instead.
+    rest_only=True returns a bare PostgREST client (same .table() query API) for headless
+    paths that never use auth/storage, which avoids most of the supabase import cost.
+    """
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise RuntimeError("Supabase credentials missing in environment (.env).")
-    try:
-        client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        # Quick test query
-        _ = client.table("recurring_payments").select("id").limit(1).execute()
+    with _clients_lock:
+        client = _clients.get(rest_only)
+        if client is not None:
+            return client
+        try:
+            client = _create_client(rest_only)
+            if probe:
+                # Quick test query
+                run_request(client.table("recurring_payments").select("id").limit(1), idempotent=True)
+        except Exception as e:
+            logger.exception("Failed to initialize Supabase client.")
+            raise RuntimeError(f"Failed to initialize Supabase client: {e}")
+        _clients[rest_only] = client
         return client
-    except Exception as e:
-        logger.exception("Failed to initialize Supabase client.")
-        raise RuntimeError(f"Failed to initialize Supabase client: {e}")
 
 
 # -----------------------------
 # UTILS
 # -----------------------------
 def parse_iso_date(date_str):
-    """Parse ISO string to date object or None."""
+    """Parse ISO string to date object or None; date objects pass through."""
     if not date_str:
         return None
+    if isinstance(date_str, datetime):
+        return date_str.date()
+    if isinstance(date_str, date):
+        return date_str
     try:
         return date.fromisoformat(date_str)
     except Exception:
@@ -88,114 +148,597 @@ def is_recurring_due(item, today=None):
     return False
 
 
+def _due_window(freq, today):
+    """Ordinal range [lo, hi) of last_recorded_date values that are NOT due today; None if never due."""
+    freq = (freq or "").strip().lower()
+    if not freq:
+        return None
+    today_ord = today.toordinal()
+    if freq == "monthly":
+        month_start = today.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return month_start.toordinal(), next_month.toordinal()
+    if freq == "yearly":
+        return date(today.year, 1, 1).toordinal(), float("inf")
+    if freq in FREQUENCY_DAYS:
+        return today_ord - FREQUENCY_DAYS[freq] + 1, float("inf")
+    if freq.isdigit():
+        return today_ord - int(freq) + 1, float("inf")
+    return None
+
+
+def _date_ordinal(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, date):
+        return value.toordinal()
+    parsed = parse_iso_date(value)
+    return parsed.toordinal() if parsed else None
+
+
+def recurring_due_mask_columns(frequencies, last_dates, today=None, active=None):
+    """Columnar is_recurring_due: one bool per position.
+
+    last_dates may hold ISO strings, dates or day ordinals. Frequencies and dates are
+    normalised once per distinct value, then every row is a pair of ordinal compares
+    against its frequency's not-due window.
+    """
+    if today is None:
+        today = date.today()
+
+    windows = {freq: _due_window(freq, today) for freq in set(frequencies)}
+    window_col = list(map(windows.__getitem__, frequencies))
+    ordinals = {value: _date_ordinal(value) for value in set(last_dates)}
+    ordinal_col = list(map(ordinals.__getitem__, last_dates))
+
+    if active is None:
+        active = (True,) * len(window_col)
+    return [
+        w is not None and a is not False and (o is None or o < w[0] or o >= w[1])
+        for w, o, a in zip(window_col, ordinal_col, active)
+    ]
+
+
+def recurring_due_mask(items, today=None):
+    """Evaluate is_recurring_due over many rows in one pass; returns a list of bools."""
+    return recurring_due_mask_columns(
+        [item.get("frequency") for item in items],
+        [item.get("last_recorded_date") for item in items],
+        today,
+        [item.get("is_active") for item in items]
+    )
+
+
+def next_due_date(item, today=None):
+    """First date on which is_recurring_due turns True for this item, or None if it never will.
+
+    Uses the same rules: calendar month/year for monthly/yearly, day counts otherwise.
+    Items never recorded are due from `today`.
+    """
+    freq = (item.get("frequency") or "").strip().lower()
+    if not freq or item.get("is_active") is False:
+        return None
+    if freq not in FREQUENCY_DAYS and not freq.isdigit():
+        return None
+
+    last_date = parse_iso_date(item.get("last_recorded_date"))
+    if not last_date:
+        return today or date.today()
+
+    if freq == "monthly":
+        return (last_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+    if freq == "yearly":
+        return date(last_date.year + 1, 1, 1)
+    if freq in FREQUENCY_DAYS:
+        return last_date + timedelta(days=FREQUENCY_DAYS[freq])
+    return last_date + timedelta(days=int(freq))
+
+
+# REMINDER_NEXT_DUE=1 once recurring_payments has the next_due_date column and it has been
+# backfilled (see backfill_next_due.py); writes then maintain it and due checks range-scan it.
+NEXT_DUE_COLUMN = os.getenv("REMINDER_NEXT_DUE", "") == "1"
+# Indexed date column a due check range-scans in each table
+DUE_DATE_COLUMNS = {"recurring_payments": "next_due_date", "one_time_reminders": "reminder_date"}
+
+
+def stored_next_due(item, today=None):
+    """next_due_date to store for a recurring row: ISO date, or None if it never falls due.
+
+    The row is due once this date is <= today. A row already due today (including one
+    recorded in a later month, which is_recurring_due treats as due) stores a date
+    no later than today.
+    """
+    if today is None:
+        today = date.today()
+    due = next_due_date(item, today)
+    if due is None:
+        return None
+    if due > today and is_recurring_due(item, today):
+        due = today
+    return due.isoformat()
+
+
+def payment_changes(frequency=None, paid_on=None):
+    """Update payload for recording a payment on `paid_on` (default today).
+
+    With NEXT_DUE_COLUMN the row's next_due_date moves too, which needs its frequency;
+    frequency=None (not known) leaves next_due_date alone. A stale next_due_date is
+    always earlier than the real one, so the row stays a candidate and the due mask
+    still decides.
+    """
+    if paid_on is None:
+        paid_on = date.today()
+    changes = {"last_recorded_date": str(paid_on)}
+    if NEXT_DUE_COLUMN and frequency is not None:
+        changes["next_due_date"] = stored_next_due({"frequency": frequency, "last_recorded_date": paid_on}, paid_on)
+    return changes
+
+
+def recurring_payment_row(name, amount, frequency, day_of_month=None, group_name="ДОМАКИНСТВО"):
+    """Build the insert payload for a recurring payment."""
+    row = {
+        "name": name,
+        "amount": amount,
+        "frequency": frequency,
+        "day_of_month": day_of_month,
+        "group_name": group_name
+    }
+    if NEXT_DUE_COLUMN:
+        row["next_due_date"] = stored_next_due(row)
+    return row
+
+
+@instrumented
 def add_recurring_payment(supabase, name, amount, frequency, day_of_month=None, group_name="ДОМАКИНСТВО"):
     """Insert a recurring payment."""
     try:
-        data = {
-            "name": name,
-            "amount": amount,
-            "frequency": frequency,
-            "day_of_month": day_of_month,
-            "group_name": group_name
-        }
-        supabase.table("recurring_payments").insert(data).execute()
+        data = recurring_payment_row(name, amount, frequency, day_of_month, group_name)
+        run_request(supabase.table("recurring_payments").insert(data))
+        invalidate_active_cache("recurring_payments")
         return True
     except Exception:
         logger.exception("Failed to add recurring payment: %s", name)
+        record_failure()
         return False
 
 
-def get_active_reminders(supabase, group_name=None):
-    """Fetch all active recurring reminders, optionally filtered by group."""
-    try:
-        query = supabase.table("recurring_payments").select("*")
+# Columns the notifier, popups and GUI actually read; keeps due checks from pulling whole rows.
+RECURRING_COLUMNS = "id,name,amount,frequency,day_of_month,group_name,last_recorded_date,is_active"
+ONE_TIME_COLUMNS = "id,name,amount,reminder_date,group_name,is_completed"
+
+
+PAGE_SIZE = 1000  # rows per keyset page; stays under PostgREST's default max-rows
+
+
+def iter_table_pages(supabase, table, columns, page_size=PAGE_SIZE, after_id=None, where=None):
+    """Yield lists of rows from `table` in id order, one request per page.
+
+    Keyset pagination (id > last id seen) never skips or repeats rows the way offsets can,
+    and never hits the server's silent row cap. `where(query)` adds filters to each page.
+    """
+    while True:
+        query = supabase.table(table).select(columns)
+        if where is not None:
+            query = where(query)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        page = run_request(query.order("id").limit(page_size), idempotent=True).data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+
+def iter_active_reminders(supabase, group_name=None, columns=RECURRING_COLUMNS, page_size=PAGE_SIZE):
+    """Yield pages of active recurring reminders; is_active and group are filtered server-side.
+
+    NULL is_active counts as active, as in is_recurring_due and the mirror (local_store.is_active_row).
+    """
+    def where(query):
+        query = query.not_.is_("is_active", "false")
+        if group_name:
+            query = query.eq("group_name", group_name)
+        return query
+
+    return iter_table_pages(supabase, "recurring_payments", columns, page_size, where=where)
+
+
+def iter_active_one_time(supabase, group_name=None, columns=ONE_TIME_COLUMNS, page_size=PAGE_SIZE):
+    """Yield pages of uncompleted one-time reminders; is_completed and group are filtered server-side.
+
+    NULL is_completed counts as open, as in the mirror.
+    """
+    def where(query):
+        query = query.not_.is_("is_completed", "true")
         if group_name:
             query = query.eq("group_name", group_name)
-        resp = query.execute()
-        rows = resp.data or []
-        active = [r for r in rows if r.get("is_active", True)]
-        return active
+        return query
+
+    return iter_table_pages(supabase, "one_time_reminders", columns, page_size, where=where)
+
+
+# -----------------------------
+# ACTIVE LIST CACHE
+# -----------------------------
+# Active lists keyed by (table, group_name, columns, client). A group lookup is answered from a
+# fresh all-groups entry when there is one, so switching the group filter costs no query.
+# Our own mutations below drop the table's entries; other clients' changes show up after the TTL.
+ACTIVE_CACHE_TTL = float(os.getenv("REMINDER_ACTIVE_CACHE_TTL", "30"))
+_active_cache = {}
+_active_cache_lock = threading.Lock()
+
+
+def invalidate_active_cache(table=None):
+    """Forget cached active lists for `table` ("recurring_payments" / "one_time_reminders"), or all."""
+    with _active_cache_lock:
+        for key in [k for k in _active_cache if table is None or k[0] == table]:
+            del _active_cache[key]
+
+
+def _cached_active(supabase, table, group_name, columns, fetch):
+    now = time.monotonic()
+    with _active_cache_lock:
+        entry = _active_cache.get((table, group_name, columns, id(supabase)))
+        if entry and entry[0] > now:
+            return list(entry[1])
+        if group_name:
+            entry = _active_cache.get((table, None, columns, id(supabase)))
+            if entry and entry[0] > now:
+                return [r for r in entry[1] if r.get("group_name") == group_name]
+    rows = [row for page in fetch(supabase, group_name, columns) for row in page]
+    with _active_cache_lock:
+        _active_cache[(table, group_name, columns, id(supabase))] = (now + ACTIVE_CACHE_TTL, rows)
+    return list(rows)
+
+
+@instrumented
+def get_active_reminders(supabase, group_name=None, columns=RECURRING_COLUMNS, use_cache=True):
+    """Fetch all active recurring reminders, optionally filtered by group."""
+    try:
+        if not use_cache:
+            return [row for page in iter_active_reminders(supabase, group_name, columns) for row in page]
+        return _cached_active(supabase, "recurring_payments", group_name, columns, iter_active_reminders)
     except Exception:
         logger.exception("Failed to fetch active reminders.")
+        record_failure()
         return []
 
 
-def get_due_reminders(supabase, today=None):
-    """Return all reminders (recurring + one-time) due today."""
+@instrumented
+def get_active_one_time(supabase, group_name=None, columns=ONE_TIME_COLUMNS, use_cache=True):
+    """Fetch all uncompleted one-time reminders, optionally filtered by group."""
+    try:
+        if not use_cache:
+            return [row for page in iter_active_one_time(supabase, group_name, columns) for row in page]
+        return _cached_active(supabase, "one_time_reminders", group_name, columns, iter_active_one_time)
+    except Exception:
+        logger.exception("Failed to fetch active one-time reminders.")
+        record_failure()
+        return []
+
+
+def recurring_due_filter(today):
+    """Build a PostgREST or-filter matching recurring rows that may be due on `today`.
+
+    Mirrors the rules in is_recurring_due. Frequencies are matched with ilike so case
+    and padding don't matter; N-day frequencies can't be expressed without knowing N,
+    so rows with an unrecognised frequency are passed through for the Python check.
+    """
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    year_start = date(today.year, 1, 1)
+
+    clauses = ["last_recorded_date.is.null"]
+    for freq in ("daily", "weekly", "quarterly"):
+        cutoff = today - timedelta(days=FREQUENCY_DAYS[freq])
+        clauses.append(f"and(frequency.ilike.*{freq}*,last_recorded_date.lte.{cutoff.isoformat()})")
+    clauses.append(
+        f"and(frequency.ilike.*monthly*,or(last_recorded_date.lt.{month_start.isoformat()},"
+        f"last_recorded_date.gte.{next_month.isoformat()}))"
+    )
+    clauses.append(f"and(frequency.ilike.*yearly*,last_recorded_date.lt.{year_start.isoformat()})")
+    clauses.append("and(" + ",".join(f"frequency.not.ilike.*{f}*" for f in FREQUENCY_DAYS) + ")")
+    return ",".join(clauses)
+
+
+def due_query(client, table, today, columns=None):
+    """Query for rows of `table` that may be due on `today`; works on sync and async clients.
+
+    Both tables are one range scan on their DUE_DATE_COLUMNS date (<= today). Recurring
+    rows not backfilled yet (next_due_date null) are included too, and without
+    NEXT_DUE_COLUMN recurring rows fall back to recurring_due_filter. Either way
+    recurring_due_mask makes the final call.
+    """
+    column = DUE_DATE_COLUMNS[table]
+    if table == "one_time_reminders":
+        return client.table(table).select(columns or ONE_TIME_COLUMNS)\
+            .not_.is_("is_completed", "true").lte(column, str(today))
+    query = client.table(table).select(columns or RECURRING_COLUMNS).not_.is_("is_active", "false")
+    if not NEXT_DUE_COLUMN:
+        return query.or_(recurring_due_filter(today))
+    return query.or_(f"{column}.lte.{today.isoformat()},{column}.is.null")
+
+
+@instrumented
+def get_due_recurring_reminders(supabase, today=None, server_filter=True):
+    """Return recurring reminders due today.
+
+    With server_filter the due conditions are sent as PostgREST filters and only
+    candidate rows are downloaded; recurring_due_mask still has the final say so the
+    result is identical to the full-table scan (server_filter=False).
+    """
     if today is None:
         today = date.today()
 
-    due = []
-
-    # recurring
     try:
-        rec = supabase.table("recurring_payments").select("*").execute()
-        for item in rec.data or []:
-            if is_recurring_due(item, today):
-                due.append(item)
+        if server_filter:
+            query = due_query(supabase, "recurring_payments", today)
+        else:
+            query = supabase.table("recurring_payments").select(RECURRING_COLUMNS)
+        rows = run_request(query, idempotent=True).data or []
+        return [item for item, due in zip(rows, recurring_due_mask(rows, today)) if due]
     except Exception:
         logger.exception("Failed to fetch recurring reminders.")
+        record_failure()
+        return []
+
+
+@instrumented
+def get_due_one_time_reminders(supabase, today=None):
+    """Return uncompleted one-time reminders dated today or earlier."""
+    if today is None:
+        today = date.today()
 
-    # one-time
     try:
-        one_time = supabase.table("one_time_reminders")\
-            .select("*")\
-            .lte("reminder_date", str(today))\
-            .eq("is_completed", False)\
-            .execute()
-        for item in one_time.data or []:
-            due.append(item)
+        one_time = run_request(due_query(supabase, "one_time_reminders", today), idempotent=True)
+        return list(one_time.data or [])
     except Exception:
         logger.exception("Failed to fetch one-time reminders.")
+        record_failure()
+        return []
+
 
+@instrumented
+def get_due_reminders(supabase, today=None, server_filter=True):
+    """Return all reminders (recurring + one-time) due today."""
+    if today is None:
+        today = date.today()
+
+    due = get_due_recurring_reminders(supabase, today, server_filter=server_filter)
+    due.extend(get_due_one_time_reminders(supabase, today))
     return due
 
 
+def one_time_reminder_row(name, amount, reminder_date, group_name="ДОМАКИНСТВО"):
+    """Build the insert payload for a one-time reminder."""
+    return {
+        "name": name,
+        "amount": amount,
+        "reminder_date": reminder_date.isoformat(),
+        "group_name": group_name,
+        "is_completed": False
+    }
+
+
+@instrumented
 def add_one_time_reminder(supabase, name, amount, reminder_date, group_name="ДОМАКИНСТВО"):
     """Insert a one-time reminder."""
     try:
-        data = {
-            "name": name,
-            "amount": amount,
-            "reminder_date": reminder_date.isoformat(),
-            "group_name": group_name,
-            "is_completed": False
-        }
-        supabase.table("one_time_reminders").insert(data).execute()
+        data = one_time_reminder_row(name, amount, reminder_date, group_name)
+        run_request(supabase.table("one_time_reminders").insert(data))
+        invalidate_active_cache("one_time_reminders")
         return True
     except Exception:
         logger.exception("Failed to add one-time reminder: %s", name)
+        record_failure()
         return False
 
 
+@instrumented
 def mark_one_time_completed(supabase, reminder_id):
     """Mark a one-time reminder as completed."""
     try:
-        supabase.table("one_time_reminders").update({"is_completed": True}).eq("id", reminder_id).execute()
+        run_request(supabase.table("one_time_reminders").update({"is_completed": True}).eq("id", reminder_id))
+        invalidate_active_cache("one_time_reminders")
         return True
     except Exception:
         logger.exception("Failed to mark one-time reminder complete: %s", reminder_id)
+        record_failure()
         return False
 
 
-def record_payment(supabase, reminder_id):
+def _payment_groups(supabase, reminder_ids, frequencies=None):
+    """[(ids, changes)]: ids grouped by the payment payload they need.
+
+    next_due_date depends on each row's frequency; when `frequencies` ({id: frequency})
+    isn't given it is read in one request. Without NEXT_DUE_COLUMN there is one group.
+    """
+    today = date.today()
+    if not NEXT_DUE_COLUMN:
+        return [(list(reminder_ids), payment_changes(None, today))]
+    if frequencies is None:
+        rows = run_request(
+            supabase.table("recurring_payments").select("id,frequency").in_("id", [str(i) for i in reminder_ids]),
+            idempotent=True
+        ).data or []
+        frequencies = {str(r["id"]): r.get("frequency") or "" for r in rows}
+    groups = {}
+    for reminder_id in reminder_ids:
+        changes = payment_changes(frequencies.get(str(reminder_id)), today)
+        groups.setdefault(tuple(sorted(changes.items())), []).append(reminder_id)
+    return [(ids, dict(key)) for key, ids in groups.items()]
+
+
+@instrumented
+def record_payment(supabase, reminder_id, frequency=None):
     """Mark recurring reminder as done today."""
     try:
-        supabase.table("recurring_payments").update({"last_recorded_date": str(date.today())}).eq("id", reminder_id).execute()
+        frequencies = None if frequency is None else {str(reminder_id): frequency}
+        for _ids, changes in _payment_groups(supabase, [reminder_id], frequencies):
+            run_request(supabase.table("recurring_payments").update(changes).eq("id", reminder_id))
+        invalidate_active_cache("recurring_payments")
         return True
     except Exception:
         logger.exception("Failed to record recurring reminder: %s", reminder_id)
+        record_failure()
         return False
 
 
-def delete_reminder(supabase, reminder_id):
-    """Delete reminder (recurring or one-time)."""
+def update_reminders(supabase, table, reminder_ids, changes):
+    """Apply the same changes to many rows of one table in a single request.
+
+    Returns {id: bool}; an id is False if the request failed or no row with it was updated.
+    """
+    reminder_ids = [str(i) for i in reminder_ids]
+    if not reminder_ids:
+        return {}
+    try:
+        resp = run_request(supabase.table(table).update(changes).in_("id", reminder_ids))
+        invalidate_active_cache(table)
+    except Exception:
+        logger.exception("Failed to update %d reminders in %s.", len(reminder_ids), table)
+        record_failure()
+        return dict.fromkeys(reminder_ids, False)
+    updated = {str(r.get("id")) for r in resp.data or []}
+    results = {i: i in updated for i in reminder_ids}
+    if len(updated) < len(results):
+        logger.warning("No %s row updated for ids: %s", table, [i for i, ok in results.items() if not ok])
+    return results
+
+
+@instrumented
+def record_payments(supabase, reminder_ids, frequencies=None):
+    """Mark many recurring reminders as done today; per-id results.
+
+    One request, or with NEXT_DUE_COLUMN one per distinct frequency (plus a lookup
+    when `frequencies`, {id: frequency}, isn't given).
+    """
+    reminder_ids = [str(i) for i in reminder_ids]
+    if not reminder_ids:
+        return {}
+    try:
+        groups = _payment_groups(supabase, reminder_ids, frequencies)
+    except Exception:
+        logger.exception("Failed to look up frequencies for %d payments.", len(reminder_ids))
+        record_failure()
+        return dict.fromkeys(reminder_ids, False)
+    results = {}
+    for ids, changes in groups:
+        results.update(update_reminders(supabase, "recurring_payments", ids, changes))
+    return results
+
+
+@instrumented
+def mark_one_time_reminders_completed(supabase, reminder_ids):
+    """Mark many one-time reminders as completed; one request, per-id results."""
+    return update_reminders(supabase, "one_time_reminders", reminder_ids, {"is_completed": True})
+
+
+@instrumented
+def delete_reminder(supabase, reminder_id, one_time=False):
+    """Delete a recurring reminder, or a one-time reminder when one_time is set."""
+    return delete_reminders(supabase, [reminder_id], one_time=one_time)
+
+
+@instrumented
+def delete_reminders(supabase, reminder_ids, one_time=False):
+    """Delete many reminders from one table in a single request."""
+    reminder_ids = list(reminder_ids)
+    if not reminder_ids:
+        return True
+    table = "one_time_reminders" if one_time else "recurring_payments"
     try:
-        # try one-time first
-        supabase.table("one_time_reminders").delete().eq("id", reminder_id).execute()
-        # then recurring
-        supabase.table("recurring_payments").delete().eq("id", reminder_id).execute()
+        run_request(supabase.table(table).delete().in_("id", reminder_ids))
+        invalidate_active_cache(table)
         return True
     except Exception:
-        logger.exception("Failed to delete reminder: %s", reminder_id)
+        logger.exception("Failed to delete reminders from %s: %s", table, reminder_ids)
+        record_failure()
         return False
+
+
+# -----------------------------
+# FORECAST
+# -----------------------------
+def _advance_ordinal(freq, ordinal):
+    """Ordinal of the next occurrence after one paid on `ordinal` (same rules as next_due_date)."""
+    if freq == "monthly":
+        d = date.fromordinal(ordinal)
+        return (d.replace(day=1) + timedelta(days=32)).replace(day=1).toordinal()
+    if freq == "yearly":
+        return date(date.fromordinal(ordinal).year + 1, 1, 1).toordinal()
+    return ordinal + (FREQUENCY_DAYS[freq] if freq in FREQUENCY_DAYS else int(freq))
+
+
+def forecast_cash_flow(recurring, one_time, start=None, days=30):
+    """Expand reminders into dated occurrences over [start, start + days) and sum amounts.
+
+    Returns {date: {group_name: amount}} in date order. Each recurring item first falls
+    on its next_due_date and then repeats as if paid on the day it fell due; anything
+    already overdue, recurring or one-time, is counted on `start`.
+    """
+    if start is None:
+        start = date.today()
+    start_ord = start.toordinal()
+    end_ord = start_ord + days
+    totals = {}
+
+    def add(ordinal, group, amount):
+        by_group = totals.setdefault(ordinal, {})
+        by_group[group] = by_group.get(group, 0.0) + amount
+
+    for item in recurring:
+        first = next_due_date(item, start)
+        if first is None:
+            continue
+        freq = item["frequency"].strip().lower()
+        group = item.get("group_name") or ""
+        amount = float(item.get("amount") or 0)
+        # A last_recorded_date in a later month is "not this month", so already due on start
+        ordinal = start_ord if is_recurring_due(item, start) else max(first.toordinal(), start_ord)
+        if freq not in ("monthly", "yearly"):
+            step = FREQUENCY_DAYS.get(freq) or int(freq)
+            if step <= 0:
+                # A 0-day frequency is due every day
+                step = 1
+            for o in range(ordinal, end_ord, step):
+                add(o, group, amount)
+            continue
+        while ordinal < end_ord:
+            add(ordinal, group, amount)
+            ordinal = _advance_ordinal(freq, ordinal)
+
+    for item in one_time:
+        if item.get("is_completed"):
+            continue
+        reminder_date = parse_iso_date(item.get("reminder_date"))
+        if reminder_date is None:
+            continue
+        ordinal = max(reminder_date.toordinal(), start_ord)
+        if ordinal < end_ord:
+            add(ordinal, item.get("group_name") or "", float(item.get("amount") or 0))
+
+    return {date.fromordinal(o): totals[o] for o in sorted(totals)}
+
+
+@instrumented
+def get_cash_flow_forecast(supabase, days=30, start=None):
+    """Fetch active reminders (one query per table) and forecast amounts owed per day and group."""
+    if start is None:
+        start = date.today()
+    end = start + timedelta(days=days)
+    try:
+        recurring = [r for page in iter_table_pages(
+            supabase, "recurring_payments", RECURRING_COLUMNS,
+            where=lambda q: q.not_.is_("is_active", "false")
+        ) for r in page]
+        one_time = [r for page in iter_table_pages(
+            supabase, "one_time_reminders", ONE_TIME_COLUMNS,
+            where=lambda q: q.not_.is_("is_completed", "true").lt("reminder_date", str(end))
+        ) for r in page]
+    except Exception:
+        logger.exception("Failed to fetch reminders for forecast.")
+        record_failure()
+        return {}
+    return forecast_cash_flow(recurring, one_time, start, days)
@@ -3,13 +3,66 @@
 Compatibility wrapper for scripts or scheduled tasks that previously called
 reminder_script.py directly. This delegates to the new modular code.
 """
+import os
 import sys
+import atexit
 from reminder_core import init_supabase
-from notifier import run_interactive, run_check_only
-import logging
+from notifier import run_interactive, run_check_only, send_native_notification, notification_text
+from local_store import LocalMirror
+from write_queue import WriteQueue
+from scheduler import DueScheduler
+from change_feed import ChangeFeed, ReminderIndex, SupabaseRealtimeSource, mirror_loader
+from metrics import write_snapshot
+from ledger import NotificationLedger
+from multi_check import load_profiles, check_profiles, exit_code, log_results, DEFAULT_CONCURRENCY
+from config import setup_logging
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("reminder_script_wrapper")
+logger = setup_logging("reminder_script_wrapper")
+
+def run_daemon(supabase_client, mirror, scheduler=None, live=False, ledger=None):
+    """Long-running mode: sleep until the next reminder falls due instead of being started by cron.
+
+    With live, a realtime change feed keeps an in-memory index current and wakes the scheduler
+    on every change, instead of re-syncing the mirror every RESYNC_SECONDS. With a ledger, a
+    restarted daemon doesn't repeat what was already announced today.
+    """
+    def on_due(items):
+        due = [item for _, item in items]
+        new = due if ledger is None else ledger.pending(due)
+        logger.info("%d reminders due (%d new): %s", len(due), len(new), ", ".join(str(item.name) for item in due))
+        if not new:
+            return
+        send_native_notification(*notification_text(new, len(due)))
+        if ledger is not None:
+            ledger.record(new)
+
+    if live:
+        index = ReminderIndex()
+        loader = mirror_loader(mirror, supabase_client)
+        feed = ChangeFeed(index, SupabaseRealtimeSource(), loader=loader, mirror=mirror).start()
+        scheduler = scheduler or DueScheduler(sleep=feed.wait)
+        scheduler.load(index.get_active_reminders(), index.get_active_one_time())
+        feed.drain_changes()
+        try:
+            scheduler.run(on_due, sync=feed.drain_changes)
+        finally:
+            feed.stop()
+        return
+
+    scheduler = scheduler or DueScheduler()
+    mirror.sync(supabase_client)
+    scheduler.load(mirror.get_active_reminders(), mirror.get_active_one_time())
+
+    def sync():
+        return mirror.sync(supabase_client)
+
+    scheduler.run(on_due, sync=sync)
+
+def _option(argv, flag):
+    """Value following `flag` in argv, or None."""
+    if flag in argv and argv.index(flag) + 1 < len(argv):
+        return argv[argv.index(flag) + 1]
+    return None
 
 def main(argv=None):
     argv = argv or sys.argv[1:]
@@ -17,21 +70,60 @@ def main(argv=None):
     if "--all" in argv:
         only_day_of_month_match = False
 
+    check_only = "check" in argv or "--check" in argv
+    daemon = "--daemon" in argv
+    live = "--live" in argv
+
+    # --metrics PATH (or REMINDER_METRICS_FILE) dumps call timings on exit: JSON for *.json, else Prometheus text
+    metrics_path = _option(argv, "--metrics") or os.getenv("REMINDER_METRICS_FILE")
+    if metrics_path:
+        atexit.register(write_snapshot, metrics_path)
+
+    if check_only and "--profiles" in argv:
+        # One process, one event loop for every household's project instead of one cron job each
+        profiles = load_profiles(_option(argv, "--profiles"))
+        concurrency = int(_option(argv, "--concurrency") or DEFAULT_CONCURRENCY)
+        results = check_profiles(profiles, concurrency=concurrency)
+        log_results(results)
+        sys.exit(exit_code(results))
+
+    mirror = LocalMirror()
+
     try:
-        supabase_client = init_supabase()
+        # Headless paths only run table queries: skip the probe round trip and the full supabase stack
+        supabase_client = init_supabase(probe=False, rest_only=True)
     except Exception:
         logger.exception("Supabase init failed.")
-        sys.exit(2)
+        if not ((check_only or daemon) and mirror.has_data()):
+            sys.exit(2)
+        logger.warning("Checking against the local mirror only.")
+        supabase_client = None
+
+    ledger = NotificationLedger()
 
-    if "check" in argv or "--check" in argv:
-        found = run_check_only(supabase_client, only_day_of_month_match=only_day_of_month_match)
+    if check_only:
+        found = run_check_only(supabase_client, only_day_of_month_match=only_day_of_month_match,
+                               ledger=ledger, mirror=mirror)
+        if found is None:
+            sys.exit(2)
         sys.exit(1 if found else 0)
 
+    if daemon:
+        try:
+            run_daemon(supabase_client, mirror, live=live and supabase_client is not None, ledger=ledger)
+        except KeyboardInterrupt:
+            logger.info("Scheduler stopped.")
+        return
+
+    writes = WriteQueue(mirror, supabase_client)
+    writes.start()
     try:
-        run_interactive(supabase_client, only_day_of_month_match=only_day_of_month_match)
+        run_interactive(supabase_client, only_day_of_month_match=only_day_of_month_match, writes=writes, ledger=ledger)
     except Exception:
         logger.exception("Interactive run failed.")
         print("Interactive run failed; see logs.")
+    finally:
+        writes.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,228 @@
+# resilience.py
+"""
+Shared request layer for Supabase calls: deadlines, retries and a circuit breaker.
+
+run_request(query) executes a postgrest query builder. Idempotent reads are
+retried on transient failures (network errors, timeouts, 5xx, 429) with jittered
+exponential backoff, within an overall deadline: each attempt's HTTP timeouts
+are capped at what is left of it, and no retry starts once the backoff would
+run past it. Every call goes through a
+CircuitBreaker. After FAILURE_THRESHOLD consecutive transient failures the
+breaker opens and later calls fail at once with BackendUnavailable instead of
+each waiting out a timeout. After RESET_SECONDS one trial call is let through
+(half-open); if it succeeds the breaker closes again. Errors the server
+answered cleanly, such as a bad filter or an RLS denial, pass straight through
+and don't count against the backend.
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger("resilience")
+
+READ_ATTEMPTS = int(os.getenv("SUPABASE_READ_ATTEMPTS", "3"))
+# Overall budget for one call including retries, in seconds
+REQUEST_DEADLINE = float(os.getenv("SUPABASE_DEADLINE", "20"))
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 2.0
+TRANSIENT_CODES = {"429", "500", "502", "503", "504", "PGRST000", "PGRST001", "PGRST002"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class BackendUnavailable(RuntimeError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    FAILURE_THRESHOLD = 3
+    RESET_SECONDS = 30.0
+
+    def __init__(self, failure_threshold=None, reset_seconds=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold or self.FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or self.RESET_SECONDS
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._listeners = []
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def add_listener(self, callback):
+        """callback(state) on every transition; runs on the thread that made the call."""
+        self._listeners.append(callback)
+
+    def _set(self, state):
+        # Caller holds the lock; returns the listeners to notify once it is released
+        if state == self._state:
+            return None
+        logger.warning("Supabase circuit %s -> %s", self._state, state)
+        self._state = state
+        return state
+
+    def _notify(self, state):
+        if state is None:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception:
+                logger.exception("Circuit breaker listener failed.")
+
+    def allow(self):
+        """True if a call may go out now. While half-open only one trial call is allowed."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self.clock() - self._opened_at < self.reset_seconds:
+                return False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            changed = self._set(HALF_OPEN)
+        self._notify(changed)
+        return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            changed = self._set(CLOSED)
+        self._notify(changed)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            changed = None
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                changed = self._set(OPEN)
+        self._notify(changed)
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            changed = self._set(CLOSED)
+        self._notify(changed)
+
+
+backend_breaker = CircuitBreaker()
+
+
+def is_transient(error):
+    """Network failures, timeouts, 5xx and rate-limit answers; anything else the server said stands."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if str(getattr(error, "code", "") or "") in TRANSIENT_CODES:
+        return True
+    # httpx.TransportError covers DNS failures, refused connections and timeouts
+    return any(cls.__name__ in ("TransportError", "TimeoutException") for cls in type(error).__mro__)
+
+
+class _DeadlineSession:
+    """Wraps a builder's httpx client so its next request gets at most `remaining` seconds per phase."""
+
+    def __init__(self, session, remaining):
+        self._session = session
+        self._remaining = remaining
+
+    def request(self, *args, **kwargs):
+        import httpx
+
+        base = self._session.timeout
+        kwargs.setdefault("timeout", httpx.Timeout(
+            connect=_capped(base.connect, self._remaining), read=_capped(base.read, self._remaining),
+            write=_capped(base.write, self._remaining), pool=_capped(base.pool, self._remaining)
+        ))
+        return self._session.request(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def _capped(timeout, remaining):
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _cap_attempt(query, deadline):
+    """Limit the next attempt to the time left before `deadline`, where the builder exposes its client."""
+    request = getattr(query, "request", None)
+    session = getattr(request, "session", None)
+    if isinstance(session, _DeadlineSession):
+        session = session._session
+    if session is None or not hasattr(session, "timeout"):
+        return
+    request.session = _DeadlineSession(session, max(0.0, deadline - time.monotonic()))
+
+
+def _backoff(attempt):
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+def run_request(query, idempotent=False, breaker=None, attempts=None, deadline=None):
+    """Execute a postgrest query through the breaker; retry transient failures when idempotent.
+
+    The whole call, retries included, ends within `deadline` seconds (REQUEST_DEADLINE).
+    """
+    breaker = breaker or backend_breaker
+    attempts = (attempts or READ_ATTEMPTS) if idempotent else 1
+    deadline = time.monotonic() + (deadline or REQUEST_DEADLINE)
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise BackendUnavailable("Supabase is unreachable (circuit open); serving cached data")
+        _cap_attempt(query, deadline)
+        try:
+            result = query.execute()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()  # the server answered
+                raise
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if attempt + 1 >= attempts or time.monotonic() + delay >= deadline:
+                raise
+            logger.info("Transient Supabase error (%s); retry %d in %.2f s", e, attempt + 1, delay)
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def run_request_async(query, idempotent=False, breaker=None, attempts=None, deadline=None):
+    """run_request for async postgrest builders; backoff sleeps without blocking the event loop."""
+    import asyncio
+
+    breaker = breaker or backend_breaker
+    attempts = (attempts or READ_ATTEMPTS) if idempotent else 1
+    deadline = time.monotonic() + (deadline or REQUEST_DEADLINE)
+    for attempt in range(attempts):
+        if not breaker.allow():
+            raise BackendUnavailable("Supabase is unreachable (circuit open)")
+        _cap_attempt(query, deadline)
+        try:
+            result = await query.execute()
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = _backoff(attempt)
+            if attempt + 1 >= attempts or time.monotonic() + delay >= deadline:
+                raise
+            logger.info("Transient Supabase error (%s); retry %d in %.2f s", e, attempt + 1, delay)
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
@@ -0,0 +1,157 @@
+# scheduler.py
+"""
+In-process due-date scheduler used by `reminder_script.py --daemon`.
+
+Every reminder's next due instant is computed once with the FREQUENCY_DAYS
+rules (reminder_core.next_due_date) and kept in a heap; the loop sleeps until
+the earliest one instead of polling. Changes coming from a mirror sync only
+reschedule the rows they touch. Rows are held as models.Reminder, so dates
+are parsed once per change rather than on every reschedule. Clock and sleep
+are injectable for tests.
+"""
+import time
+import heapq
+import logging
+import itertools
+from datetime import datetime, timedelta, time as day_time
+from local_store import ONE_TIME_TABLE
+from models import Reminder, Kind
+
+logger = logging.getLogger("scheduler")
+
+
+class DueScheduler:
+    NOTIFY_AT = day_time(9, 0)  # time of day a reminder that falls due on a date is announced
+    RESYNC_SECONDS = 15 * 60  # upper bound on sleep so remote changes are picked up
+
+    def __init__(self, clock=datetime.now, sleep=None, notify_at=None):
+        self.clock = clock
+        self.sleep = sleep or time.sleep
+        self.notify_at = notify_at or self.NOTIFY_AT
+        self._heap = []
+        self._entries = {}  # key -> (due_at, seq) currently valid; stale heap entries are skipped
+        self._items = {}
+        self._snoozed = {}  # key -> datetime an already-announced item comes back
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -----------------------------
+    # SCHEDULING
+    # -----------------------------
+    def due_at(self, item, one_time=False):
+        """Datetime the item should be announced, or None if it never falls due."""
+        if not isinstance(item, Reminder):
+            item = Reminder.from_row(item, Kind.ONE_TIME if one_time else Kind.RECURRING)
+        due_date = item.next_due(self.clock().date())
+        if due_date is None:
+            return None
+        return datetime.combine(due_date, self.notify_at)
+
+    def _push(self, key, due_at):
+        seq = next(self._seq)
+        self._entries[key] = (due_at, seq)
+        heapq.heappush(self._heap, (due_at, seq, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Too many superseded entries; rebuild from the live ones
+            self._heap = [(d, s, k) for k, (d, s) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def schedule(self, item, one_time=False):
+        """(Re)compute one reminder's due instant."""
+        if not isinstance(item, Reminder):
+            item = Reminder.from_row(item, Kind.ONE_TIME if one_time else Kind.RECURRING)
+        key = (item.table, item.id)
+        due_at = self.due_at(item, one_time)
+        if due_at is None:
+            self.remove(*key)
+            return None
+        # Re-syncing an item that was already announced must not announce it again before its snooze ends
+        snoozed_until = self._snoozed.get(key)
+        if snoozed_until is not None:
+            if due_at < snoozed_until:
+                due_at = snoozed_until
+            else:
+                del self._snoozed[key]
+        self._items[key] = item
+        self._push(key, due_at)
+        return due_at
+
+    def remove(self, table, reminder_id):
+        key = (table, str(reminder_id))
+        self._entries.pop(key, None)
+        self._items.pop(key, None)
+        self._snoozed.pop(key, None)
+
+    def load(self, recurring, one_time):
+        """Replace the whole schedule."""
+        self._heap, self._entries, self._items, self._snoozed = [], {}, {}, {}
+        for item in recurring:
+            self.schedule(item)
+        for item in one_time:
+            self.schedule(item, one_time=True)
+
+    def apply_changes(self, sync_result):
+        """Reschedule only the rows a mirror sync reported as changed or deleted."""
+        touched = 0
+        for table, (changed, deleted) in (sync_result or {}).items():
+            for item in changed:
+                self.schedule(item, one_time=(table == ONE_TIME_TABLE))
+            for reminder_id in deleted:
+                self.remove(table, reminder_id)
+            touched += len(changed) + len(deleted)
+        return touched
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def _discard_stale(self):
+        while self._heap:
+            due_at, seq, key = self._heap[0]
+            if self._entries.get(key) == (due_at, seq):
+                return
+            heapq.heappop(self._heap)
+
+    def next_wakeup(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Return items due at `now`; each is snoozed to the next day until it is recorded."""
+        now = now or self.clock()
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            due.append((key[0], self._items[key]))
+            tomorrow = datetime.combine(now.date() + timedelta(days=1), self.notify_at)
+            self._snoozed[key] = tomorrow
+            self._push(key, tomorrow)
+        return due
+
+    # -----------------------------
+    # LOOP
+    # -----------------------------
+    def run_once(self, on_due):
+        """Fire due items, then return the number of seconds to sleep."""
+        now = self.clock()
+        due = self.pop_due(now)
+        if due:
+            on_due(due)
+        wake = self.next_wakeup()
+        limit = now + timedelta(seconds=self.RESYNC_SECONDS)
+        if wake is None or wake > limit:
+            wake = limit
+        return max(0.0, (wake - self.clock()).total_seconds())
+
+    def run(self, on_due, sync=None, should_stop=lambda: False):
+        """Sleep until the earliest reminder, announce it, and pick up remote changes via sync()."""
+        while not should_stop():
+            delay = self.run_once(on_due)
+            logger.info("Next check in %.0f s (%d reminders scheduled)", delay, len(self))
+            self.sleep(delay)
+            if sync is not None:
+                self.apply_changes(sync())
@@ -0,0 +1,381 @@
+# write_queue.py
+"""
+Durable write-behind journal for reminder mutations.
+
+Adds, payments, completions and deletes are applied to the local mirror right
+away and journalled in the mirror's SQLite file. A background thread flushes
+the journal to Supabase in batches, retrying failed batches with exponential
+backoff, so the UI never blocks on the network and offline writes survive a
+restart. Repeated changes to the same id are coalesced into one entry.
+
+Only transient failures (network, timeouts, 5xx, 429, an open circuit) are
+retried. A batch the server rejects outright (RLS denial, unknown column, bad
+value) is resent row by row so one bad row doesn't hold back the others, and
+the rows still rejected are dead-lettered: kept in the journal with their
+error, no longer sent or replayed onto the mirror, until the user retries or
+discards them.
+"""
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from datetime import date
+from reminder_core import recurring_payment_row, one_time_reminder_row, payment_changes, invalidate_active_cache
+from local_store import RECURRING_TABLE, ONE_TIME_TABLE
+from resilience import run_request, is_transient, BackendUnavailable
+
+logger = logging.getLogger("write_queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_writes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    op TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    payload TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (tbl, row_id)
+);
+"""
+
+
+def is_retryable(error):
+    """Whether a failed write may succeed later as is; anything else the server rejected for good."""
+    return isinstance(error, BackendUnavailable) or is_transient(error)
+
+
+class WriteQueue:
+    BATCH_SIZE = 100
+    BASE_DELAY = 2.0
+    MAX_DELAY = 300.0
+    FLUSH_INTERVAL = 30.0
+
+    def __init__(self, mirror, supabase=None):
+        self.mirror = mirror
+        self.supabase = supabase
+        self.conn = mirror.conn
+        self._lock = mirror._lock
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        with self._lock, self.conn:
+            self.conn.executescript(SCHEMA)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pending_writes)")}
+            if "dead" not in columns:
+                # Journals written before dead-lettering
+                self.conn.execute("ALTER TABLE pending_writes ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+        mirror.write_queue = self
+
+    def set_client(self, supabase):
+        self.supabase = supabase
+        self.kick()
+
+    # -----------------------------
+    # MUTATIONS
+    # -----------------------------
+    def add_recurring_payment(self, name, amount, frequency, day_of_month=None, group_name="ДОМАКИНСТВО"):
+        """Queue a recurring payment insert; returns the client-generated id."""
+        row = recurring_payment_row(name, amount, frequency, day_of_month, group_name)
+        return self._queue_insert(RECURRING_TABLE, row)
+
+    def add_one_time_reminder(self, name, amount, reminder_date, group_name="ДОМАКИНСТВО"):
+        """Queue a one-time reminder insert; returns the client-generated id."""
+        row = one_time_reminder_row(name, amount, reminder_date, group_name)
+        return self._queue_insert(ONE_TIME_TABLE, row)
+
+    def record_payment(self, reminder_id):
+        return self.record_payments([reminder_id])
+
+    def mark_one_time_completed(self, reminder_id):
+        return self._queue_update(ONE_TIME_TABLE, reminder_id, {"is_completed": True})
+
+    def record_payments(self, reminder_ids):
+        """Queue payments for many ids; identical payloads flush as a single in_() update.
+
+        The payload's next_due_date comes from each row's frequency in the mirror.
+        """
+        today = date.today()
+        for reminder_id in reminder_ids:
+            row = self.mirror.get_row(RECURRING_TABLE, reminder_id)
+            changes = payment_changes(row.get("frequency") or "" if row else None, today)
+            self._queue_update(RECURRING_TABLE, reminder_id, changes)
+        return True
+
+    def mark_one_time_reminders_completed(self, reminder_ids):
+        return self._queue_updates(ONE_TIME_TABLE, reminder_ids, {"is_completed": True})
+
+    def delete_reminder(self, reminder_id, one_time=False):
+        return self.delete_reminders([reminder_id], one_time=one_time)
+
+    def delete_reminders(self, reminder_ids, one_time=False):
+        """Queue deletes for ids in one table; they are flushed as a single in_() request."""
+        table = ONE_TIME_TABLE if one_time else RECURRING_TABLE
+        for reminder_id in reminder_ids:
+            self.enqueue(table, "delete", reminder_id)
+        self.mirror.delete_ids(table, reminder_ids)
+        self.kick()
+        return True
+
+    def _queue_insert(self, table, row):
+        row = dict(row, id=str(uuid.uuid4()))
+        self.enqueue(table, "insert", row["id"], row)
+        self.mirror.upsert_rows(table, [row])
+        self.kick()
+        return row["id"]
+
+    def _queue_update(self, table, reminder_id, changes):
+        return self._queue_updates(table, [reminder_id], changes)
+
+    def _queue_updates(self, table, reminder_ids, changes):
+        for reminder_id in reminder_ids:
+            self.enqueue(table, "update", reminder_id, changes)
+            self.mirror.update_row(table, reminder_id, changes)
+        self.kick()
+        return True
+
+    def enqueue(self, table, op, row_id, payload=None):
+        """Journal a mutation, coalescing it with any pending entry for the same id.
+
+        A new change to a dead-lettered entry makes it live again.
+        """
+        row_id = str(row_id)
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "SELECT seq, op, payload FROM pending_writes WHERE tbl = ? AND row_id = ?", (table, row_id)
+            )
+            existing = cur.fetchone()
+            if existing is None:
+                self.conn.execute(
+                    "INSERT INTO pending_writes (tbl, op, row_id, payload) VALUES (?, ?, ?, ?)",
+                    (table, op, row_id, json.dumps(payload, default=str, sort_keys=True) if payload is not None else None)
+                )
+                return
+            seq, old_op, old_payload = existing
+            if old_op == "delete":
+                return
+            if op == "delete":
+                if old_op == "insert":
+                    # Never reached the server; nothing to send
+                    self.conn.execute("DELETE FROM pending_writes WHERE seq = ?", (seq,))
+                else:
+                    self.conn.execute(
+                        "UPDATE pending_writes SET op = 'delete', payload = NULL, dead = 0, attempts = 0, "
+                        "next_attempt = 0 WHERE seq = ?", (seq,)
+                    )
+                return
+            merged = dict(json.loads(old_payload or "{}"), **(payload or {}))
+            self.conn.execute(
+                "UPDATE pending_writes SET payload = ?, dead = 0, attempts = 0, next_attempt = 0 WHERE seq = ?",
+                (json.dumps(merged, default=str, sort_keys=True), seq)
+            )
+
+    # -----------------------------
+    # INSPECTION
+    # -----------------------------
+    def pending(self):
+        """Journal entries as (table, op, row_id, payload, error); error is set only for dead-lettered ones."""
+        with self._lock:
+            cur = self.conn.execute("SELECT tbl, op, row_id, payload, dead, last_error FROM pending_writes ORDER BY seq")
+            return [(t, op, rid, json.loads(p) if p else None, err if dead else None)
+                    for t, op, rid, p, dead, err in cur.fetchall()]
+
+    def pending_count(self):
+        """Entries still waiting to be sent (dead-lettered ones excluded)."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_writes WHERE dead = 0").fetchone()[0]
+
+    def failed(self):
+        """Dead-lettered entries: (table, op, row_id, payload, error)."""
+        return [entry for entry in self.pending() if entry[4] is not None]
+
+    def failed_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_writes WHERE dead = 1").fetchone()[0]
+
+    def retry_failed(self):
+        """Put dead-lettered entries back in line, e.g. after a policy or schema fix."""
+        with self._lock, self.conn:
+            count = self.conn.execute(
+                "UPDATE pending_writes SET dead = 0, attempts = 0, next_attempt = 0 WHERE dead = 1"
+            ).rowcount
+        self.kick()
+        return count
+
+    def discard_failed(self):
+        """Drop dead-lettered entries; the next sync restores the server's rows in the mirror."""
+        with self._lock, self.conn:
+            return self.conn.execute("DELETE FROM pending_writes WHERE dead = 1").rowcount
+
+    def replay(self, mirror):
+        """Re-apply pending writes on top of freshly synced mirror rows (dead-lettered ones excluded)."""
+        for table, op, row_id, payload, error in self.pending():
+            if error is not None:
+                continue
+            if op == "delete":
+                mirror.delete_ids(table, [row_id])
+            elif op == "insert":
+                mirror.upsert_rows(table, [payload])
+            else:
+                mirror.update_row(table, row_id, payload)
+
+    # -----------------------------
+    # FLUSH
+    # -----------------------------
+    def _ready_batch(self, now):
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT seq, tbl, op, row_id, payload, attempts FROM pending_writes "
+                "WHERE dead = 0 AND next_attempt <= ? ORDER BY seq LIMIT ?",
+                (now, self.BATCH_SIZE)
+            )
+            return cur.fetchall()
+
+    def _send_group(self, supabase, table, op, entries):
+        """One request per (table, op, payload shape); raises on failure."""
+        if op == "insert":
+            rows = [json.loads(e[4]) for e in entries]
+            run_request(supabase.table(table).upsert(rows, on_conflict="id"))
+        elif op == "delete":
+            run_request(supabase.table(table).delete().in_("id", [e[3] for e in entries]))
+        else:
+            run_request(supabase.table(table).update(json.loads(entries[0][4])).in_("id", [e[3] for e in entries]))
+        invalidate_active_cache(table)
+
+    def _group(self, batch):
+        groups = {}
+        for entry in batch:
+            _, table, op, _, payload, _ = entry
+            if op == "insert":
+                key = (table, op, tuple(sorted(json.loads(payload))))
+            elif op == "update":
+                key = (table, op, payload)
+            else:
+                key = (table, op, None)
+            groups.setdefault(key, []).append(entry)
+        return groups
+
+    def _backoff(self, attempts):
+        delay = min(self.MAX_DELAY, self.BASE_DELAY * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.0)
+
+    def flush(self, supabase=None):
+        """Send every ready journal entry. Returns the number of entries written."""
+        supabase = supabase or self.supabase
+        if supabase is None:
+            return 0
+        written = 0
+        with self._flush_lock:
+            while True:
+                now = time.time()
+                batch = self._ready_batch(now)
+                if not batch:
+                    break
+                failed = False
+                for (table, op, _), entries in self._group(batch).items():
+                    try:
+                        self._send_group(supabase, table, op, entries)
+                    except Exception as e:
+                        if is_retryable(e):
+                            failed = True
+                            logger.warning("Flush of %d %s %s failed: %s", len(entries), table, op, e)
+                            self._reschedule(entries, now, str(e))
+                        elif len(entries) > 1:
+                            logger.warning("Server rejected %d %s %s (%s); sending them one by one",
+                                           len(entries), table, op, e)
+                            sent, failed_now = self._send_each(supabase, table, op, entries, now)
+                            written += sent
+                            failed = failed or failed_now
+                        else:
+                            self._dead_letter(entries, e)
+                        continue
+                    self._remove(entries)
+                    written += len(entries)
+                if failed:
+                    break
+        if written:
+            logger.info("Flushed %d pending writes (%d left)", written, self.pending_count())
+        return written
+
+    def _remove(self, entries):
+        # An entry coalesced while its request was in flight keeps its seq but gains a
+        # newer op/payload; only drop entries that still hold exactly what was sent.
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM pending_writes WHERE seq = ? AND op = ? AND payload IS ?",
+                [(e[0], e[2], e[4]) for e in entries]
+            )
+
+    def _send_each(self, supabase, table, op, entries, now):
+        """Send a rejected group one entry at a time. Returns (entries written, hit a transient failure)."""
+        sent = 0
+        for i, entry in enumerate(entries):
+            try:
+                self._send_group(supabase, table, op, [entry])
+            except Exception as e:
+                if is_retryable(e):
+                    self._reschedule(entries[i:], now, str(e))
+                    return sent, True
+                self._dead_letter([entry], e)
+                continue
+            self._remove([entry])
+            sent += 1
+        return sent, False
+
+    def _dead_letter(self, entries, error):
+        for entry in entries:
+            logger.error("Server rejected %s %s %s; keeping it aside: %s", entry[2], entry[1], entry[3], error)
+        # Like _remove: an entry changed while in flight holds a newer write and stays live
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pending_writes SET dead = 1, attempts = attempts + 1, last_error = ? "
+                "WHERE seq = ? AND op = ? AND payload IS ?",
+                [(str(error), e[0], e[2], e[4]) for e in entries]
+            )
+
+    def _reschedule(self, entries, now, error):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pending_writes SET attempts = ?, next_attempt = ?, last_error = ? WHERE seq = ?",
+                [(e[5] + 1, now + self._backoff(e[5]), error, e[0]) for e in entries]
+            )
+
+    # -----------------------------
+    # BACKGROUND FLUSHER
+    # -----------------------------
+    def kick(self):
+        """Ask the background flusher to run now."""
+        self._wake.set()
+
+    def start(self, interval=None):
+        if self._thread and self._thread.is_alive():
+            return
+        interval = interval or self.FLUSH_INTERVAL
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.wait(interval)
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Background flush failed.")
+
+        self._thread = threading.Thread(target=run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if flush:
+            self.flush()